@@ -0,0 +1,87 @@
+"""
+Run the benchmarks without asv
+
+    python -m benchmarks [--max-size N] [--repeat R] [pattern]
+
+Times are the best of R runs. Peak memory is measured with tracemalloc, so
+it counts the Python allocations of the call, not the process RSS as asv does.
+"""
+from argparse import ArgumentParser
+from importlib import import_module
+from itertools import product
+from pkgutil import iter_modules
+from typing import Any, Iterator, List, Sequence, Tuple
+import gc
+import time
+import tracemalloc
+import benchmarks
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("pattern", nargs="?", default="", help="Filter by name")
+    parser.add_argument("--max-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, cls, method in _benchmarks():
+        if args.pattern not in name:
+            continue
+        for params in _params(cls):
+            size = params[-1] if len(params) > 0 else 0
+            if isinstance(size, int) and size > args.max_size:
+                continue
+            value = _run(cls, method, params, args.repeat)
+            shown = ", ".join(str(param) for param in params)
+            print(f"{name}({shown}): {value}", flush=True)
+
+
+def _benchmarks() -> Iterator[Tuple[str, type, str]]:
+    for info in iter_modules(benchmarks.__path__):
+        if not info.name.startswith("bench_"):
+            continue
+        module = import_module(f"benchmarks.{info.name}")
+        for cls in vars(module).values():
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for method in vars(cls):
+                if method.startswith(("time_", "peakmem_")):
+                    yield f"{info.name}.{cls.__name__}.{method}", cls, method
+
+
+def _params(cls: type) -> List[Tuple[Any, ...]]:
+    params: Sequence[Any] = getattr(cls, "params", [])
+    if len(params) == 0:
+        return [()]
+    # As in asv, a list of lists holds the values of each parameter
+    if all(isinstance(param, list) for param in params):
+        return list(product(*params))
+    return [(param,) for param in params]
+
+
+def _run(cls: type, method: str, params: Tuple[Any, ...], repeat: int) -> str:
+    bench = cls()
+    if hasattr(bench, "setup"):
+        bench.setup(*params)
+    try:
+        call = getattr(bench, method)
+        if method.startswith("peakmem_"):
+            gc.collect()
+            tracemalloc.start()
+            call(*params)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return f"{peak / 2**20:.1f} MiB"
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call(*params)
+            best = min(best, time.perf_counter() - start)
+        return f"{best * 1e3:.3f} ms"
+    finally:
+        if hasattr(bench, "teardown"):
+            bench.teardown(*params)
+
+
+if __name__ == "__main__":
+    main()
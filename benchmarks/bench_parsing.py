@@ -0,0 +1,42 @@
+"""Loading decks from files (asv-style benchmarks)"""
+import shutil
+import tempfile
+from os import path as pathfunc
+from schg import FromDSS, FromFile, generate_dss, generate_schg
+from schg.__parser import redirect_handler
+
+SIZES = [100, 10_000, 100_000, 1_000_000]
+
+
+class Parse:
+    # Seconds: a 1M deck takes about half a minute to parse
+    timeout = 300
+    params = SIZES
+    param_names = ["size"]
+
+    def setup(self, size: int) -> None:
+        self.folder = tempfile.mkdtemp(prefix="schg-bench-")
+        self.schg = pathfunc.join(self.folder, "network.schg")
+        generate_schg(self.schg, size, substations=10)
+        self.dss = generate_dss(self.folder, size, substations=10, per_file=5_000)
+
+    def teardown(self, size: int) -> None:
+        shutil.rmtree(self.folder)
+
+    def time_from_file(self, size: int) -> None:
+        FromFile(self.schg)
+
+    def time_from_dss(self, size: int) -> None:
+        FromDSS(self.dss)
+
+    def time_from_dss_fast(self, size: int) -> None:
+        FromDSS(self.dss, fast=True)
+
+    def time_from_dss_threads(self, size: int) -> None:
+        FromDSS(self.dss, workers=4)
+
+    def time_redirect_handler(self, size: int) -> None:
+        redirect_handler(self.dss)
+
+    def peakmem_from_dss(self, size: int) -> None:
+        FromDSS(self.dss)
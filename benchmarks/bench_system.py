@@ -0,0 +1,112 @@
+"""Topology building and validation (asv-style benchmarks)"""
+from random import Random
+from typing import List, Tuple
+from schg import CompactSystem, State, Switch, System
+from .networks import GENERATORS
+
+SIZES = [100, 10_000, 100_000, 1_000_000]
+NETWORKS = list(GENERATORS)
+# Switches toggled (or checked) by each timed call
+SAMPLE = 100
+# Opening a switch rebuilds its island: the commits toggle enough switches to
+# visit about COMMIT_NODES switches, and at least one
+COMMIT_NODES = 100_000
+# Seconds: building the 1M networks alone takes most of asv's default 60
+TIMEOUT = 300
+
+
+class Load:
+    timeout = TIMEOUT
+    params = [NETWORKS, SIZES]
+    param_names = ["network", "size"]
+
+    def setup(self, network: str, size: int) -> None:
+        self.sys, self.switches = GENERATORS[network](size)
+        self.pairs: List[Tuple[Switch, Switch]] = [
+            link.switches for link in self.sys._links
+        ]
+
+    def time_link_many(self, network: str, size: int) -> None:
+        System().link_many(self.pairs)
+
+    def time_link(self, network: str, size: int) -> None:
+        sys = System()
+        for sw1, sw2 in self.pairs:
+            sys.link(sw1, sw2)
+
+    def time_energized_forest(self, network: str, size: int) -> None:
+        # The first check builds the connectivity index
+        sys = System()
+        sys.link_many(self.pairs)
+        sys.inform_change(self.switches[0])
+
+    def time_compact(self, network: str, size: int) -> None:
+        CompactSystem.from_system(self.sys)
+
+    def peakmem_system(self, network: str, size: int) -> None:
+        GENERATORS[network](size)
+
+    def peakmem_compact(self, network: str, size: int) -> None:
+        CompactSystem.from_system(self.sys)
+
+
+class Toggle:
+    """Latency of SAMPLE single-switch operations"""
+
+    timeout = TIMEOUT
+    params = [NETWORKS, SIZES]
+    param_names = ["network", "size"]
+
+    def setup(self, network: str, size: int) -> None:
+        self.sys, switches = GENERATORS[network](size)
+        self.sample = Random(1).sample(switches, min(SAMPLE, len(switches)))
+        self.commits = self.sample[: max(1, COMMIT_NODES // size)]
+        # Build the connectivity index, which the timed calls reuse
+        self.sys.inform_change(self.sample[0])
+
+    def time_inform_change(self, network: str, size: int) -> None:
+        for sw in self.sample:
+            self.sys.inform_change(sw)
+
+    def time_commit_change(self, network: str, size: int) -> None:
+        # Toggle without validation, then back. Fewer switches on the larger
+        # networks: see COMMIT_NODES
+        for sw in self.commits:
+            for _ in range(2):
+                sw._state = State(not sw.state.value)
+                self.sys.commit_change(sw)
+
+    def time_is_substations_connected(self, network: str, size: int) -> None:
+        self.sys.is_substations_connected
+
+    def time_ismeshed(self, network: str, size: int) -> None:
+        self.sys.ismeshed
+
+
+class Batch:
+    """Throughput of validating many independent toggles"""
+
+    timeout = TIMEOUT
+    params = [NETWORKS, SIZES]
+    param_names = ["network", "size"]
+
+    def setup(self, network: str, size: int) -> None:
+        self.sys, switches = GENERATORS[network](size)
+        self.sample = Random(2).sample(switches, min(10 * SAMPLE, len(switches)))
+        self.compact = CompactSystem.from_system(self.sys)
+        # Build the connectivity indexes, which the timed calls reuse
+        self.sys.inform_change(self.sample[0])
+        self.compact.check(0)
+        # SAMPLE steps valid to the last one: valid toggles, each undone
+        errors = self.sys.check_toggles(self.sample)
+        valid = [sw for sw, sw_errors in zip(self.sample, errors) if not sw_errors]
+        self.plan = [sw for sw in valid[: SAMPLE // 2] for _ in range(2)]
+
+    def time_check_toggles(self, network: str, size: int) -> None:
+        self.sys.check_toggles(self.sample)
+
+    def time_compact_check_toggles(self, network: str, size: int) -> None:
+        self.compact.check_toggles(self.sample)
+
+    def time_validate_plan(self, network: str, size: int) -> None:
+        self.sys.validate_plan(self.plan)
@@ -0,0 +1,51 @@
+"""In-memory synthetic networks for the benchmarks (see schg.iter_synthetic)"""
+from typing import Callable, Dict, List, Tuple
+from schg import OffLoad, OnLoad, Switch, System, iter_synthetic
+
+Network = Tuple[System, List[Switch]]
+
+
+def radial(size: int, seed: int = 0) -> Network:
+    """One substation feeding radial feeders"""
+    return build(size, seed, substations=1, ties=0.0)
+
+
+def meshed(size: int, seed: int = 0) -> Network:
+    """One substation whose feeders are joined by many tie switches"""
+    return build(size, seed, substations=1, ties=0.1)
+
+
+def multi_substation(size: int, seed: int = 0) -> Network:
+    """Ten substations whose feeders are joined by a few tie switches"""
+    return build(size, seed, substations=10, ties=0.02)
+
+
+def build(
+    size: int, seed: int = 0, substations: int = 1, ties: float = 0.02
+) -> Network:
+    switches: Dict[str, Switch] = {}
+    pairs: List[Tuple[Switch, Switch]] = []
+    layout = iter_synthetic(size, seed, substations=substations, ties=ties)
+    for definition in layout:
+        sw: Switch
+        if definition.type_sw is OffLoad:
+            sw = OffLoad(definition.name, definition.state)
+        else:
+            sw = OnLoad(
+                definition.name,
+                definition.state,
+                on_substation=definition.on_substation,
+            )
+        switches[sw.name] = sw
+        pairs += [(sw, switches[link]) for link in definition.links]
+
+    sys = System()
+    sys.link_many(pairs)
+    return sys, list(switches.values())
+
+
+GENERATORS: Dict[str, Callable[[int], Network]] = {
+    "radial": radial,
+    "meshed": meshed,
+    "multi_substation": multi_substation,
+}
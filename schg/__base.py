@@ -1,7 +1,31 @@
 from abc import abstractmethod, ABC
-from copy import copy
 from enum import Enum, auto
-from typing import Iterable, List, Optional, Set, Tuple
+from functools import wraps
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+from .__connectivity import DisjointSet
+from .__dynamic import DynamicForest
+from .__stats import CheckEvent, Stats
+
+if TYPE_CHECKING:
+    from .__compact import CompactSystem
 
 
 class LinkError(Enum):
@@ -20,6 +44,34 @@ class SCHGError(Exception):
     pass
 
 
+class SwitchingPlanError(SCHGError):
+    """Raised when a step of a switching plan fails
+
+    `args[0]` holds the SwitchingErrors of the failing step, as in SCHGError.
+    """
+
+    def __init__(
+        self, errors: List[SwitchingError], step: int, switch: "Switch"
+    ) -> None:
+        super().__init__(errors, step, switch)
+        self.step = step
+        self.switch = switch
+
+
+class Validation(Enum):
+    """How System.inform_change validates a toggle
+
+    DELTA only examines the islands touched by the toggled switch.
+    FULL re-evaluates the whole network and is kept as a reference.
+    DYNAMIC keeps the energized network in a DynamicForest, updated on each
+    committed toggle, and answers without traversing the islands.
+    """
+
+    DELTA = auto()
+    FULL = auto()
+    DYNAMIC = auto()
+
+
 class State(Enum):
     ON = 1
     OFF = 0
@@ -35,6 +87,8 @@ class State(Enum):
 
 
 class Switch(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def on_substation(self) -> bool:
@@ -69,7 +123,7 @@ class Switch(ABC):
 
     @sys.setter
     @abstractmethod
-    def sys(self, sys: "System") -> None:
+    def sys(self, sys: Optional["System"]) -> None:
         ...
 
     @property
@@ -85,6 +139,10 @@ class Switch(ABC):
             return [SwitchingError.SYSTEM_NOT_DEFINED]
         return self.sys.inform_change(self)
 
+    def _notify_commit(self) -> None:
+        if self.sys is not None:
+            self.sys.commit_change(self)
+
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, Switch):
             return self.name == __o.name
@@ -112,6 +170,7 @@ class OnLoad(Switch):
         on_substation: bool = False,
     ) -> None:
         self._name = name
+        self._hash = hash(name)
         self.__state = initial_state
         self._on_substation = on_substation
         self._sys: Optional["System"] = None
@@ -141,14 +200,19 @@ class OnLoad(Switch):
         return self._sys
 
     @sys.setter
-    def sys(self, sys: "System") -> None:
+    def sys(self, sys: Optional["System"]) -> None:
         self._sys = sys
 
+    def __hash__(self) -> int:
+        # The name is fixed, so its hash is computed once
+        return self._hash
+
     def toggle_state(self) -> None:
         erros = self._notify()
         if len(erros) > 0:
             raise SCHGError(erros)
         self.__state = State(not self.__state.value)
+        self._notify_commit()
 
 
 class OffLoad(Switch):
@@ -158,6 +222,7 @@ class OffLoad(Switch):
         initial_state: State,
     ) -> None:
         self.__name = name
+        self._hash = hash(name)
         self.__state = initial_state
         self._sys: Optional["System"] = None
 
@@ -186,9 +251,13 @@ class OffLoad(Switch):
         return self._sys
 
     @sys.setter
-    def sys(self, sys: "System") -> None:
+    def sys(self, sys: Optional["System"]) -> None:
         self._sys = sys
 
+    def __hash__(self) -> int:
+        # The name is fixed, so its hash is computed once
+        return self._hash
+
     def toggle_state(self) -> None:
         """Try to toggle the switch
 
@@ -199,9 +268,12 @@ class OffLoad(Switch):
         if len(erros) > 0:
             raise SCHGError(erros)
         self.__state = State(not self.__state.value)
+        self._notify_commit()
 
 
 class Link:
+    __slots__ = ("_switches", "_hash")
+
     def __init__(self, sw1: Switch, sw2: Switch) -> None:
         if sw1 == sw2:
             raise SCHGError([LinkError.SELF_LINKING])
@@ -209,24 +281,38 @@ class Link:
         if sw1.on_substation and sw2.on_substation and sw1.ison and sw2.ison:
             raise SCHGError([LinkError.SUBSTATION_LINKING])
 
-        self._link = set([sw1, sw2])
+        if sw2.name < sw1.name:
+            sw1, sw2 = sw2, sw1
+        self._switches = (sw1, sw2)
+        self._hash = hash(self._switches)
+
+    @classmethod
+    def _trusted(cls, sw1: Switch, sw2: Switch, hash_: int) -> "Link":
+        """
+        Link already validated, with `sw1.name < sw2.name` and
+        `hash_ == hash((sw1.name, sw2.name))`, which is `hash((sw1, sw2))`
+        """
+        link = cls.__new__(cls)
+        link._switches = (sw1, sw2)
+        link._hash = hash_
+        return link
 
     @property
     def switches(self) -> Tuple[Switch, Switch]:
-        link = sorted(tuple(self._link), key=lambda sw: sw.name)
-        return (link[0], link[1])
+        return self._switches
 
     @property
     def ison(self) -> bool:
-        return self.switches[0].ison and self.switches[1].ison
+        sw1, sw2 = self._switches
+        return sw1.ison and sw2.ison
 
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, Link):
-            return self.switches == __o.switches
+            return self._switches == __o._switches
         return False
 
     def __hash__(self) -> int:
-        return hash(self.switches)
+        return self._hash
 
     def __repr__(self) -> str:
         sw1, sw2 = self.switches
@@ -238,11 +324,103 @@ class Link:
 
 LinkSet = Set[Link]
 
+_States = Dict[Switch, State]
+_NO_OVERLAY: _States = {}
+
+
+def _ison(sw: Switch, overlay: _States) -> bool:
+    state = overlay.get(sw) if overlay else None
+    if state is None:
+        return sw.ison
+    return state == State.ON
+
+
+class _Overlay:
+    """Hypothetical states on top of the committed states of a System
+
+    The islands under the overlay are the sets of `forest`, except for the
+    switches given another island key in `labels`. `merged` maps the keys of
+    the islands joined since to the key they were joined into, and `totals`
+    holds the (cycles, substations) of the keys whose island changed.
+    `cycles` and `heavy` are the union-find totals under the overlay.
+    """
+
+    __slots__ = ("forest", "states", "labels", "merged", "totals", "cycles", "heavy")
+
+    def __init__(self, forest: DisjointSet[Switch]) -> None:
+        self.forest = forest
+        self.states: _States = {}
+        self.labels: Dict[Switch, object] = {}
+        self.merged: Dict[object, object] = {}
+        self.totals: Dict[object, Tuple[int, int]] = {}
+        self.cycles = forest.cycles
+        self.heavy = forest.heavy
+
+    def copy(self) -> "_Overlay":
+        overlay = _Overlay(self.forest)
+        overlay.states = self.states.copy()
+        overlay.labels = self.labels.copy()
+        overlay.merged = self.merged.copy()
+        overlay.totals = self.totals.copy()
+        overlay.cycles, overlay.heavy = self.cycles, self.heavy
+        return overlay
+
+    def island(self, sw: Switch) -> Tuple[object, int, int]:
+        """Key, cycles and substations of the island of `sw`, which is ON"""
+        key = self.labels.get(sw)
+        if key is None:
+            key = self.forest.find(sw)
+        merged = self.merged
+        while key in merged:
+            # Path halving, as in DisjointSet
+            parent = merged[key]
+            merged[key] = merged.get(parent, parent)
+            key = merged[key]
+        totals = self.totals.get(key)
+        if totals is None:
+            forest_key = cast(Switch, key)
+            return (
+                key,
+                self.forest.cycles_of(forest_key),
+                self.forest.weight(forest_key),
+            )
+        return key, totals[0], totals[1]
+
+
+def _compact() -> Type["CompactSystem"]:
+    # __compact imports this module
+    from .__compact import CompactSystem
+
+    return CompactSystem
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _measured(check: str) -> Callable[[F], F]:
+    """Record the calls of a System method in `System.stats`, if enabled"""
+
+    def decorate(method: F) -> F:
+        @wraps(method)
+        def measured(self: "System", *args: Any, **kwargs: Any) -> Any:
+            if self.stats is None:
+                return method(self, *args, **kwargs)
+            return self.stats._measure(check, method, self, *args, **kwargs)
+
+        return cast(F, measured)
+
+    return decorate
+
 
 class System:
-    def __init__(self) -> None:
+    def __init__(self, validation: Validation = Validation.DELTA) -> None:
+        self.validation = validation
+        self.stats: Optional[Stats] = None
         self.__switches: _SetSw = set()
         self._links: LinkSet = set()
+        self._adjacency: Dict[Switch, _SetSw] = {}
+        self._forest: Optional[DisjointSet[Switch]] = None
+        self._dynamic: Optional[DynamicForest[Switch]] = None
 
     def link(self, sw1: Switch, sw2: Switch) -> None:
         """Link two switches
@@ -256,10 +434,203 @@ class System:
 
         self.__switches.add(sw1)
         self.__switches.add(sw2)
-        self._links.add(Link(sw1, sw2))
+        link = Link(sw1, sw2)
+        is_new = link not in self._links
+        self._links.add(link)
+        self._adjacency.setdefault(sw1, set()).add(sw2)
+        self._adjacency.setdefault(sw2, set()).add(sw1)
         sw1.sys = self
         sw2.sys = self
 
+        if self._forest is not None:
+            for sw in (sw1, sw2):
+                if sw.ison:
+                    self._forest.add(sw, sw.on_substation)
+            if is_new and link.ison:
+                self._forest.union(sw1, sw2)
+
+        if self._dynamic is not None:
+            for sw in (sw1, sw2):
+                if sw.ison:
+                    self._dynamic.add_vertex(sw, sw.on_substation)
+            if is_new and link.ison:
+                self._dynamic.insert_edge(sw1, sw2)
+
+    def link_many(self, pairs: Iterable[Tuple[Switch, Switch]]) -> None:
+        """Link many pairs of switches at once
+
+        Pairs may repeat in any order. Every pair is validated before the
+        system is changed, and the energized forest is rebuilt once.
+
+        Raises:
+            SCHGError: Raises when some LinkError occurs (nothing is linked)
+        """
+        self.__link_many(pairs)
+        # Rebuilt on the next check
+        self._forest = None
+        self._dynamic = None
+
+    def __link_many(self, pairs: Iterable[Tuple[Switch, Switch]]) -> None:
+        # Keyed on the names, whose hashes are cached. Few objects are kept
+        # alive meanwhile, so the garbage collector has little to traverse.
+        links: Set[Link] = set()
+        for sw1, sw2 in pairs:
+            name1, name2 = sw1.name, sw2.name
+            if name2 < name1:
+                links.add(Link._trusted(sw2, sw1, hash((name2, name1))))
+            else:
+                links.add(Link._trusted(sw1, sw2, hash((name1, name2))))
+
+        for link in links:
+            sw1, sw2 = link._switches
+            if sw1.name == sw2.name:
+                raise SCHGError([LinkError.SELF_LINKING])
+            if sw1.on_substation and sw2.on_substation and sw1.ison and sw2.ison:
+                raise SCHGError([LinkError.SUBSTATION_LINKING])
+
+        self._links.update(links)
+        adjacency = self._adjacency
+        for link in links:
+            sw1, sw2 = link._switches
+            known = adjacency.get(sw1)
+            if known is None:
+                adjacency[sw1] = {sw2}
+                self.__switches.add(sw1)
+                sw1.sys = self
+            else:
+                known.add(sw2)
+            known = adjacency.get(sw2)
+            if known is None:
+                adjacency[sw2] = {sw1}
+                self.__switches.add(sw2)
+                sw2.sys = self
+            else:
+                known.add(sw1)
+
+    def unlink(self, sw1: Switch, sw2: Switch) -> None:
+        """Remove the link between two switches
+
+        A switch left without links is removed from the system.
+
+        Raises:
+            KeyError: Raises when the switches are not linked
+        """
+        self._links.remove(Link(sw1, sw2))
+        for sw, other in ((sw1, sw2), (sw2, sw1)):
+            neighbors = self._adjacency[sw]
+            neighbors.discard(other)
+            if len(neighbors) == 0:
+                del self._adjacency[sw]
+                self.__switches.discard(sw)
+                if sw.sys is self:
+                    sw.sys = None
+        # Rebuilt on the next check
+        self._forest = None
+        self._dynamic = None
+
+    def instrument(
+        self, callback: Optional[Callable[[CheckEvent], None]] = None
+    ) -> Stats:
+        """Start recording the timings and traversals of the checks
+
+        Set `stats` back to None to stop. While disabled, the checks only
+        pay for testing `stats`.
+
+        Args:
+            callback: Called after each measured check
+        Returns:
+            The new `stats`
+        """
+        self.stats = Stats(callback)
+        return self.stats
+
+    def commit_change(self, sw: Switch) -> None:
+        """Update the incremental indexes after `sw` was toggled
+
+        The indexes are changed in place, so the toggle and this call need
+        exclusive access to the system: no check may run meanwhile.
+        """
+        self.__commit((sw,))
+
+    @_measured("commit_change")
+    def __commit(self, switches: Sequence[Switch]) -> None:
+        """Update the indexes after all of `switches` were toggled"""
+        opened = [sw for sw in switches if not sw.ison]
+        closed = [sw for sw in switches if sw.ison]
+        dynamic = self._dynamic
+        if dynamic is not None:
+            # The edges are those of the linked vertices of the forest
+            for sw in opened:
+                if sw in dynamic:
+                    for next_sw in self._adjacency.get(sw, ()):
+                        if next_sw in dynamic:
+                            dynamic.delete_edge(sw, next_sw)
+                    dynamic.remove_vertex(sw)
+            for sw in closed:
+                if sw not in dynamic:
+                    dynamic.add_vertex(sw, sw.on_substation)
+                    for next_sw in self._adjacency.get(sw, ()):
+                        if next_sw in dynamic:
+                            dynamic.insert_edge(sw, next_sw)
+
+        forest = self._forest
+        if forest is None:
+            return
+
+        # Union-find can't split sets: rebuild the islands left by the
+        # opened switches, with whatever the closed ones join to them
+        visited = {sw for sw in opened if sw in forest}
+        rebuilt = [
+            island_sw
+            for sw in list(visited)
+            for next_sw in self.__neighbors_on(sw)
+            for island_sw in self.__component(next_sw, visited)
+        ]
+        forest.forget([sw for sw in visited if sw in forest])
+        rebuilt += [sw for sw in closed if sw not in forest and sw not in visited]
+        for island_sw in rebuilt:
+            forest.add(island_sw, island_sw.on_substation)
+            for next_sw in self.__switches_connected(island_sw):
+                if next_sw in forest:
+                    forest.union(island_sw, next_sw)
+
+    def __build_forest(self, overlay: _States = _NO_OVERLAY) -> DisjointSet[Switch]:
+        forest: DisjointSet[Switch] = DisjointSet()
+        for sw in self.__switches:
+            if _ison(sw, overlay):
+                forest.add(sw, sw.on_substation)
+        for link in self._links:
+            sw1, sw2 = link.switches
+            if _ison(sw1, overlay) and _ison(sw2, overlay):
+                forest.union(sw1, sw2)
+        if self.stats is not None:
+            self.stats._visit(len(self.__switches), len(self._links))
+        return forest
+
+    def __energized_forest(self) -> DisjointSet[Switch]:
+        forest = self._forest
+        if forest is None:
+            forest = self._forest = self.__build_forest()
+            if self.stats is not None:
+                self.stats.forest_misses += 1
+        elif self.stats is not None:
+            self.stats.forest_hits += 1
+        return forest
+
+    def __dynamic_forest(self) -> DynamicForest[Switch]:
+        dynamic = self._dynamic
+        if dynamic is None:
+            dynamic = self._dynamic = DynamicForest()
+            for sw in self.__switches:
+                if sw.ison:
+                    dynamic.add_vertex(sw, sw.on_substation)
+            for link in self._links:
+                if link.ison:
+                    dynamic.insert_edge(*link.switches)
+            if self.stats is not None:
+                self.stats._visit(len(self.__switches), len(self._links))
+        return dynamic
+
     @property
     def links(self) -> List[Link]:
         return sorted(
@@ -267,90 +638,646 @@ class System:
             key=lambda link: link.switches[0].name + link.switches[1].name,
         )
 
-    def __switches_connected(self, sw: Switch) -> Iterable[Switch]:
-        for link in self.links:
-            if not link.ison:
+    def neighbors(self, sw: Switch) -> _SetSw:
+        """Switches linked to `sw`, regardless of their states"""
+        return self._adjacency.get(sw, set())
+
+    def __neighbors_on(
+        self, sw: Switch, overlay: _States = _NO_OVERLAY
+    ) -> Iterator[Switch]:
+        """Energized switches linked to `sw`, whatever the state of `sw`"""
+        for next_sw in self._adjacency.get(sw, ()):
+            if _ison(next_sw, overlay):
+                yield next_sw
+
+    def __switches_connected(
+        self, sw: Switch, overlay: _States = _NO_OVERLAY
+    ) -> Iterable[Switch]:
+        if not _ison(sw, overlay):
+            return
+
+        for next_sw in self._adjacency.get(sw, ()):
+            if _ison(next_sw, overlay):
+                yield next_sw
+
+    def __component(
+        self, sw: Switch, visited: _SetSw, overlay: _States = _NO_OVERLAY
+    ) -> Iterator[Switch]:
+        """Energized switches reachable from `sw` and not yet in `visited`"""
+        if sw in visited:
+            return
+        visited.add(sw)
+        stack = [sw]
+        while stack:
+            current = stack.pop()
+            yield current
+            for next_sw in self.__switches_connected(current, overlay):
+                if next_sw not in visited:
+                    visited.add(next_sw)
+                    stack.append(next_sw)
+
+    def __island(
+        self, sw: Switch, visited: _SetSw, overlay: _States = _NO_OVERLAY
+    ) -> Tuple[int, int]:
+        """Cycles and substations of the energized island of `sw`"""
+        switches = links = substations = 0
+        for comp_sw in self.__component(sw, visited, overlay):
+            switches += 1
+            substations += comp_sw.on_substation
+            for _ in self.__switches_connected(comp_sw, overlay):
+                links += 1
+        if self.stats is not None:
+            self.stats._visit(switches, links // 2)
+        return links // 2 - switches + 1, substations
+
+    def __substations_per_component(self, overlay: _States = _NO_OVERLAY) -> List[int]:
+        visited: _SetSw = set()
+        counts = []
+        for sw in self.__switches:
+            if sw in visited or not _ison(sw, overlay):
                 continue
-            if sw not in link.switches:
-                continue
-
-            sw1, sw2 = link.switches
-            next_sw = sw1 if sw1 != sw else sw2
+            component = self.__component(sw, visited, overlay)
+            counts.append(sum(1 for comp_sw in component if comp_sw.on_substation))
+        if self.stats is not None:
+            self.stats._visit(len(visited), self.__links_among(visited, overlay))
+        return counts
 
-            yield next_sw
+    def __links_among(self, switches: Iterable[Switch], overlay: _States) -> int:
+        """Energized links of `switches`, counted once if both ends are in"""
+        ends = sum(1 for sw in switches for _ in self.__switches_connected(sw, overlay))
+        return ends // 2
 
     @property
     def swicthes(self) -> List[Switch]:
         return sorted(self.__switches, key=lambda sw: sw.name)
 
+    def feeder(self, sw: Switch) -> Optional[Switch]:
+        """The substation switch energizing `sw`
+
+        Read from the energized forest, which is kept up to date on each
+        committed toggle. When substations are interconnected, one of them is
+        returned.
+
+        Returns:
+            None if `sw` is de-energized (open, or in an island without a
+            substation)
+        """
+        forest = self.__energized_forest()
+        if sw not in forest:
+            return None
+        return forest.source(sw)
+
+    def deenergized(self) -> List[Switch]:
+        """Switches without a substation: open, or in an island without one"""
+        forest = self.__energized_forest()
+        return [
+            sw for sw in self.swicthes if sw not in forest or forest.source(sw) is None
+        ]
+
+    def save(self, path: str) -> None:
+        """Write a binary snapshot of the system to `path`
+
+        The snapshot is the CompactSystem layout, so it can also be loaded
+        without building the Switch objects: `CompactSystem.load(path)`.
+        """
+        _compact().from_system(self).save(path)
+
+    @classmethod
+    def load(cls, path: str, validation: Validation = Validation.DELTA) -> "System":
+        """Load a snapshot written by `save`
+
+        Raises:
+            ValueError: Raises when the file is not a supported snapshot
+        """
+        sys = _compact().load(path, mmap=False).to_system()
+        sys.validation = validation
+        return sys
+
     @property
     def ismeshed(self) -> bool:
-        number_switches_on = sum(1 for sw in self.swicthes if sw.ison)
-        number_link_on = sum(1 for link in self.links if link.ison)
-        return not (number_link_on == (number_switches_on - 1))
+        return self.__meshed(_NO_OVERLAY)
+
+    @_measured("ismeshed")
+    def __meshed(self, overlay: _States) -> bool:
+        return self.__build_forest(overlay).cycles > 0
 
     @property
     def is_substations_connected(self) -> bool:
-        for sw in self.swicthes:
-            if self.__substations_connected(sw, allowed=1):
-                return True
+        return self.__substations_interconnected(_NO_OVERLAY)
 
-        return False
+    @_measured("is_substations_connected")
+    def __substations_interconnected(self, overlay: _States) -> bool:
+        return any(count > 1 for count in self.__substations_per_component(overlay))
 
     def __substations_connected(
-        self,
-        sw: Switch,
-        allowed: int,
-        count: int = 0,
-        visited: Optional[List[Switch]] = None,
+        self, sw: Switch, allowed: int, overlay: _States, visited: _SetSw
     ) -> bool:
-        if visited is None:
-            visited = []
-        visited.append(sw)
-        if sw.on_substation:
-            count += 1
-
-        if count > allowed:
-            return True
-
-        sws = self.__switches_connected(sw)
-
-        for next_sw in sws:
-            if next_sw == sw:
-                continue
-            if next_sw in visited:
-                continue
-            if self.__substations_connected(next_sw, allowed, count, visited):
+        """Whether more than `allowed` substations are energized with `sw`"""
+        count = 0
+        for comp_sw in self.__component(sw, visited, overlay):
+            count += comp_sw.on_substation
+            if count > allowed:
                 return True
-
         return False
 
     def offload_trying_on_load(self, sw: Switch) -> bool:
+        return self.__offload_trying_on_load(sw, _NO_OVERLAY)
+
+    @_measured("offload_trying_on_load")
+    def __offload_trying_on_load(self, sw: Switch, overlay: _States) -> bool:
         if not isinstance(sw, OffLoad):
             return False
 
-        initial_state = copy(sw._state)
-        if initial_state == State.OFF:
-            sw._state = State.ON
-
-        value = self.__substations_connected(sw, allowed=0)
-        sw._state = initial_state
-        return value
+        overlay = {**overlay, sw: State.ON}
+        visited: _SetSw = set()
+        found = self.__substations_connected(sw, 0, overlay, visited)
+        if self.stats is not None:
+            self.stats._visit(len(visited), self.__links_among(visited, overlay))
+        return found
 
+    @_measured("inform_change")
     def inform_change(self, sw: Switch) -> List[SwitchingError]:
-        state_initial = copy(sw.state)
-        sw._state = State(not sw.state.value)
+        """Check the errors that toggling `sw` would cause
+
+        The check is done according to `System.validation`. The states of
+        the switches are never modified, so checks may run concurrently with
+        each other. They must not run during a real toggle, whose
+        commit_change edits the indexes.
+        """
+        if self.validation == Validation.FULL:
+            return self.__full_check(sw, _NO_OVERLAY)
+        if self.validation == Validation.DYNAMIC:
+            return self.__dynamic_check(sw)
+        return self.__delta_check(sw, _Overlay(self.__energized_forest()))[0]
+
+    @_measured("check_toggles")
+    def check_toggles(self, switches: Iterable[Switch]) -> List[List[SwitchingError]]:
+        """Check the errors that toggling each switch alone would cause
+
+        All candidates are checked against the current state with the delta
+        validation, so the energized islands are labeled once for the batch.
+
+        Args:
+            switches (Iterable[Switch]): Candidates to toggle
+        Returns:
+            The SwitchingErrors of each candidate, in the same order
+        """
+        overlay = _Overlay(self.__energized_forest())
+        return [self.__delta_check(sw, overlay)[0] for sw in switches]
+
+    def apply_plan(self, switches: Sequence[Switch]) -> None:
+        """Toggle the switches in order, all or nothing
+
+        Each intermediate state is validated incrementally from the previous
+        one, as an overlay of hypothetical states. The switches are only
+        toggled once the whole plan is valid, and the indexes are updated
+        once for the switches whose state changed in the end.
+
+        Args:
+            switches (Sequence[Switch]): Switches to toggle, in order
+        Raises:
+            SwitchingPlanError: Raises with the first step that fails
+        """
+        error = self.validate_plan(switches)
+        if error is not None:
+            raise error
+
+        toggled: Dict[Switch, None] = {}
+        for sw in switches:
+            # Toggled twice, it is back to its state
+            if sw in toggled:
+                del toggled[sw]
+            else:
+                toggled[sw] = None
+        for sw in toggled:
+            sw._state = State(not sw._state.value)
+        self.__commit(list(toggled))
+
+    @_measured("validate_plan")
+    def validate_plan(self, switches: Sequence[Switch]) -> Optional[SwitchingPlanError]:
+        """Check a switching plan without applying it
+
+        Returns:
+            The error of the first step that fails, or None
+        """
+        overlay = _Overlay(self.__energized_forest())
+        for step, sw in enumerate(switches):
+            if sw.sys is not self:
+                errors = [SwitchingError.SYSTEM_NOT_DEFINED]
+            elif self.validation == Validation.FULL:
+                errors = self.__full_check(sw, overlay.states)
+            else:
+                errors, cycles, heavy = self.__delta_check(sw, overlay)
+            if len(errors) > 0:
+                return SwitchingPlanError(errors, step, sw)
+
+            if self.validation != Validation.FULL:
+                overlay.cycles, overlay.heavy = cycles, heavy
+            self.__advance(sw, overlay)
+        return None
+
+    def __advance(self, sw: Switch, overlay: _Overlay) -> None:
+        """Toggle `sw` in `overlay`, relabeling the islands it changes
+
+        Closing joins the keys of the islands around `sw`. Opening a radial
+        island walks its pieces side by side until all but one are done:
+        only those get new keys, so the cost is the size of the smaller
+        pieces. A meshed island is walked and relabeled whole.
+        """
+        states = overlay.states
+        if not _ison(sw, states):
+            keys: List[object] = []
+            links = cycles = 0
+            substations = int(sw.on_substation)
+            for next_sw in self.__neighbors_on(sw, states):
+                links += 1
+                key, island_cycles, island_substations = self.__island_of(
+                    next_sw, overlay
+                )
+                if key not in keys:
+                    keys.append(key)
+                    cycles += island_cycles
+                    substations += island_substations
+            key = keys[0] if len(keys) > 0 else object()
+            for other in keys[1:]:
+                overlay.merged[other] = key
+            overlay.totals[key] = (cycles + links - len(keys), substations)
+            overlay.labels[sw] = key
+            states[sw] = State.ON
+            return
+
+        key, cycles, substations = self.__island_of(sw, overlay)
+        states[sw] = State.OFF
+        visited = {sw}
+        pieces: List[List[Switch]] = []
+        if cycles > 0:
+            # Several neighbors may share a piece
+            for next_sw in self.__neighbors_on(sw, states):
+                if next_sw not in visited:
+                    pieces.append(list(self.__component(next_sw, visited, states)))
+        else:
+            # A tree leaves one piece per neighbor. The last one left keeps
+            # the key of the island.
+            walks: List[Tuple[Iterator[Switch], List[Switch]]] = [
+                (self.__component(next_sw, visited, states), [])
+                for next_sw in self.__neighbors_on(sw, states)
+            ]
+            while len(walks) > 1:
+                for index, (walk, members) in enumerate(walks):
+                    member = next(walk, None)
+                    if member is None:
+                        pieces.append(members)
+                        del walks[index]
+                        break
+                    members.append(member)
+
+        substations -= sw.on_substation
+        for members in pieces:
+            piece_key = object()
+            links = self.__links_among(members, states)
+            piece_substations = sum(member.on_substation for member in members)
+            for member in members:
+                overlay.labels[member] = piece_key
+            overlay.totals[piece_key] = (
+                links - len(members) + 1,
+                piece_substations,
+            )
+            substations -= piece_substations
+            if self.stats is not None:
+                self.stats.island_misses += 1
+                self.stats._visit(len(members), links)
+        if cycles == 0:
+            overlay.totals[key] = (0, substations)
+
+    @_measured("restoration_plan")
+    def restoration_plan(
+        self,
+        switches: Iterable[Switch],
+        *,
+        candidates: Optional[Iterable[Switch]] = None,
+        locked: Iterable[Switch] = (),
+        max_steps: int = 5,
+        budget: float = 1.0,
+    ) -> Optional[List[Switch]]:
+        """Search the shortest valid plan energizing `switches`
+
+        The plans are explored breadth first, each step checked with the
+        delta validation from the overlay of the previous one. Plans that
+        toggle the same set of switches end in the same state, so each set
+        is only expanded once. Apply the result with `apply_plan`.
+
+        Args:
+            switches (Iterable[Switch]): Switches to energize (ON and fed
+                by a substation)
+            candidates (Iterable[Switch]): Switches the plan may toggle.
+                By default, the de-energized area around `switches`: the
+                switches reachable from them without crossing an energized
+                switch, which holds the tie switches that can restore it.
+            locked (Iterable[Switch]): Switches never toggled, as the ones
+                isolating a fault
+            max_steps (int): Longest plan searched
+            budget (float): Seconds before giving up
+        Returns:
+            The switches to toggle, in order, or None when no plan was
+            found within `max_steps` and `budget`
+        """
+        targets = list(switches)
+        overlay = _Overlay(self.__energized_forest())
+        if self.__energizes(targets, overlay):
+            return []
+
+        if candidates is None:
+            candidates = self.__deenergized_area(targets)
+        excluded = set(locked)
+        # Closing switches first finds the restoring plans sooner
+        pool = sorted(
+            (sw for sw in candidates if sw not in excluded and sw.sys is self),
+            key=lambda sw: (sw.ison, sw.name),
+        )
+
+        deadline = perf_counter() + budget
+        seen: Set[FrozenSet[Switch]] = {frozenset()}
+        frontier: List[Tuple[List[Switch], FrozenSet[Switch], _Overlay]]
+        frontier = [([], frozenset(), overlay)]
+        for _ in range(max_steps):
+            next_frontier = []
+            for plan, toggled, overlay in frontier:
+                for sw in pool:
+                    if perf_counter() > deadline:
+                        return None
+                    key = toggled ^ {sw}
+                    if key in seen:
+                        continue
+                    errors, cycles, heavy = self.__delta_check(sw, overlay)
+                    if len(errors) > 0:
+                        continue
+                    seen.add(key)
+
+                    next_overlay = overlay.copy()
+                    next_overlay.cycles, next_overlay.heavy = cycles, heavy
+                    self.__advance(sw, next_overlay)
+                    if self.__energizes(targets, next_overlay):
+                        return plan + [sw]
+                    next_frontier.append((plan + [sw], key, next_overlay))
+            frontier = next_frontier
+        return None
+
+    @_measured("order_plan")
+    def order_plan(
+        self, targets: Mapping[Switch, State], *, budget: float = 1.0
+    ) -> Optional[List[Switch]]:
+        """Search a safe order to bring the switches to the `targets` states
+
+        The switches left untouched are contracted once into the energized
+        islands they form, so each step is checked on a graph of the
+        switches to toggle only. The orders are explored depth first:
+        openings are tried first, OnLoad before OffLoad, then the OffLoad
+        closings while de-energized, and the OnLoad closings last. The sets
+        of toggles proven to be dead ends are remembered, so no state is
+        explored twice. Apply the result with `apply_plan`.
+
+        Args:
+            targets (Mapping[Switch, State]): Final state of each switch
+            budget (float): Seconds before giving up
+        Returns:
+            The switches to toggle, in order, or None when no safe order
+            exists or none was found within `budget`
+        Raises:
+            SCHGError: Raises when some switch is not in the system
+        """
+        pending = [sw for sw, state in targets.items() if sw.state != state]
+        if any(sw.sys is not self for sw in pending):
+            raise SCHGError([SwitchingError.SYSTEM_NOT_DEFINED])
+        if len(pending) == 0:
+            return []
+        pending.sort(
+            key=lambda sw: (not sw.ison, isinstance(sw, OnLoad) != sw.ison, sw.name)
+        )
+
+        # A meshed or interconnected island of untouched switches stays so
+        fixed = self.__build_forest({sw: State.OFF for sw in pending})
+        if fixed.cycles > 0 or fixed.heavy > 0:
+            return None
+        position = {sw: index for index, sw in enumerate(pending)}
+        anchors: Dict[Switch, List[Switch]] = {}
+        links: List[Tuple[Switch, Switch]] = []
+        for sw in pending:
+            anchors[sw] = []
+            for next_sw in self._adjacency[sw]:
+                index = position.get(next_sw)
+                if index is None:
+                    if next_sw.ison:
+                        anchors[sw].append(fixed.find(next_sw))
+                elif index > position[sw]:
+                    links.append((sw, next_sw))
+
+        def contract(on: FrozenSet[Switch]) -> DisjointSet[Switch]:
+            forest: DisjointSet[Switch] = DisjointSet()
+            for sw in on:
+                forest.add(sw, sw.on_substation)
+                for root in anchors[sw]:
+                    forest.add(root, fixed.weight(root))
+                    forest.union(sw, root)
+            for sw1, sw2 in links:
+                if sw1 in on and sw2 in on:
+                    forest.union(sw1, sw2)
+            return forest
+
+        deadline = perf_counter() + budget
+        failed: Set[FrozenSet[Switch]] = set()
+        plan: List[Switch] = []
+        # The switches ON, their forest, the toggles done and the next
+        # candidate of each step
+        on = frozenset(sw for sw in pending if sw.ison)
+        stack: List[
+            Tuple[FrozenSet[Switch], DisjointSet[Switch], FrozenSet[Switch], int]
+        ] = [(on, contract(on), frozenset(), 0)]
+        while stack:
+            on, forest, done, start = stack[-1]
+            if len(done) == len(pending):
+                return plan
+            if perf_counter() > deadline:
+                return None
+
+            for index in range(start, len(pending)):
+                sw = pending[index]
+                key = done | {sw}
+                if sw in done or key in failed:
+                    continue
+                next_on = on ^ {sw}
+                next_forest = contract(next_on)
+                if next_forest.cycles > 0 or next_forest.heavy > 0:
+                    continue
+                if isinstance(sw, OffLoad):
+                    if sw in on:
+                        substations = forest.weight(sw)
+                    else:
+                        substations = next_forest.weight(sw) - sw.on_substation
+                    if substations > 0:
+                        continue
+
+                stack[-1] = (on, forest, done, index + 1)
+                stack.append((next_on, next_forest, key, 0))
+                plan.append(sw)
+                break
+            else:
+                failed.add(done)
+                stack.pop()
+                if len(plan) > 0:
+                    plan.pop()
+        return None
+
+    def __energizes(self, targets: Iterable[Switch], overlay: _Overlay) -> bool:
+        """Whether every target is ON and fed by a substation under `overlay`"""
+        for sw in targets:
+            if not _ison(sw, overlay.states):
+                return False
+            _, _, substations = self.__island_of(sw, overlay)
+            if substations == 0:
+                return False
+        return True
+
+    def __deenergized_area(self, switches: Iterable[Switch]) -> _SetSw:
+        """De-energized switches reachable from `switches` through others"""
+        forest = self.__energized_forest()
+
+        def energized(sw: Switch) -> bool:
+            return sw in forest and forest.source(sw) is not None
+
+        area = {sw for sw in switches if not energized(sw)}
+        stack = list(area)
+        while stack:
+            for next_sw in self._adjacency.get(stack.pop(), ()):
+                if next_sw not in area and not energized(next_sw):
+                    area.add(next_sw)
+                    stack.append(next_sw)
+        return area
+
+    def __full_check(self, sw: Switch, overlay: _States) -> List[SwitchingError]:
+        overlay = {**overlay, sw: State(not _ison(sw, overlay))}
 
         error = []
-        if self.ismeshed:
+        if self.__meshed(overlay):
             error.append(SwitchingError.CAUSES_MESH)
 
-        if self.is_substations_connected:
+        if self.__substations_interconnected(overlay):
             error.append(SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION)
 
-        if self.offload_trying_on_load(sw):
+        if self.__offload_trying_on_load(sw, overlay):
             error.append(SwitchingError.OFFLOAD_SWITCHING_ON_LOAD)
 
-        sw._state = state_initial
+        return error
+
+    def __island_of(self, sw: Switch, overlay: _Overlay) -> Tuple[object, int, int]:
+        """Key, cycles and substations of the island of `sw` under `overlay`"""
+        if self.stats is not None:
+            self.stats.island_hits += 1
+        return overlay.island(sw)
+
+    def __dynamic_check(self, sw: Switch) -> List[SwitchingError]:
+        """Errors of toggling `sw`, as __delta_check, from the DynamicForest"""
+        dynamic = self.__dynamic_forest()
+        if sw.ison:
+            cycles, substations = dynamic.cycles_of(sw), dynamic.weight(sw)
+            cycles_after = dynamic.cycles - cycles
+            heavy_after = dynamic.heavy - (substations > 1)
+            if cycles > 0 or substations > 1:
+                # Explore the islands left once `sw` opens, as __delta_check:
+                # the forest is only read
+                opened = {sw: State.OFF}
+                visited: _SetSw = set()
+                for next_sw in self.__neighbors_on(sw, opened):
+                    if next_sw in visited:
+                        continue
+                    island_cycles, island_substations = self.__island(
+                        next_sw, visited, opened
+                    )
+                    cycles_after += island_cycles
+                    heavy_after += island_substations > 1
+            feeds = substations > 0
+        else:
+            keys: Set[object] = set()
+            links = heavy = 0
+            substations = int(sw.on_substation)
+            feeds = False
+            for next_sw in self.__neighbors_on(sw):
+                links += 1
+                key = dynamic.component(next_sw)
+                if key in keys:
+                    continue
+                keys.add(key)
+                island_substations = dynamic.weight(next_sw)
+                heavy += island_substations > 1
+                substations += island_substations
+                feeds = feeds or island_substations > 0
+            cycles_after = dynamic.cycles + links - len(keys)
+            heavy_after = dynamic.heavy - heavy + (substations > 1)
+
+        error = []
+        if cycles_after > 0:
+            error.append(SwitchingError.CAUSES_MESH)
+
+        if heavy_after > 0:
+            error.append(SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION)
+
+        if isinstance(sw, OffLoad) and feeds:
+            error.append(SwitchingError.OFFLOAD_SWITCHING_ON_LOAD)
 
         return error
+
+    def __delta_check(
+        self, sw: Switch, overlay: _Overlay
+    ) -> Tuple[List[SwitchingError], int, int]:
+        """Errors of toggling `sw` under `overlay`
+
+        Only the islands touched by `sw` are examined.
+
+        Returns:
+            The errors, the cycles and the interconnected islands after it
+        """
+        states = overlay.states
+        if _ison(sw, states):
+            _, cycles, substations = self.__island_of(sw, overlay)
+            cycles_after = overlay.cycles - cycles
+            heavy_after = overlay.heavy - (substations > 1)
+            if cycles > 0 or substations > 1:
+                # Explore the islands left once `sw` opens
+                opened = {**states, sw: State.OFF}
+                visited: _SetSw = set()
+                for next_sw in self.__neighbors_on(sw, opened):
+                    if next_sw in visited:
+                        continue
+                    island_cycles, island_substations = self.__island(
+                        next_sw, visited, opened
+                    )
+                    cycles_after += island_cycles
+                    heavy_after += island_substations > 1
+            feeds = substations > 0
+        else:
+            keys: Set[object] = set()
+            links = heavy = 0
+            substations = int(sw.on_substation)
+            feeds = False
+            for next_sw in self.__neighbors_on(sw, states):
+                links += 1
+                key, _, island_substations = self.__island_of(next_sw, overlay)
+                if key in keys:
+                    continue
+                keys.add(key)
+                heavy += island_substations > 1
+                substations += island_substations
+                feeds = feeds or island_substations > 0
+            cycles_after = overlay.cycles + links - len(keys)
+            heavy_after = overlay.heavy - heavy + (substations > 1)
+
+        error = []
+        if cycles_after > 0:
+            error.append(SwitchingError.CAUSES_MESH)
+
+        if heavy_after > 0:
+            error.append(SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION)
+
+        if isinstance(sw, OffLoad) and feeds:
+            error.append(SwitchingError.OFFLOAD_SWITCHING_ON_LOAD)
+
+        return error, cycles_after, heavy_after
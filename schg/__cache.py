@@ -0,0 +1,150 @@
+from hashlib import sha256
+from os import path as pathfunc
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+import os
+import struct
+import tempfile
+from .__compact import CompactSystem
+from .__parser import Stamp, file_stamp
+from .__snapshot import read_snapshot, write_snapshot
+
+MAGIC = b"SCHGCACHE\0"
+VERSION = 2
+
+# path, mtime_ns, size, sha256
+_Source = Tuple[str, int, int, bytes]
+
+
+def load_cache(cache_dir: str, path: str, mode: str) -> Optional[CompactSystem]:
+    """
+    Load the network compiled from `path`, if no source file changed since
+    Args:
+        cache_dir: The directory of the cache files.
+        path: The root file of the network.
+        mode: How the network was parsed (part of the cache key).
+    Returns:
+        The compiled network, or None on a miss.
+    """
+    try:
+        with open(_cache_path(cache_dir, path, mode), "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                return None
+            (version,) = _unpack(file, "<I")
+            if version != VERSION:
+                return None
+            for source in _read_sources(file):
+                if not _is_fresh(source):
+                    return None
+            return _read_network(file)
+    except (OSError, ValueError, struct.error, EOFError):
+        return None
+
+
+def store_cache(
+    cache_dir: str,
+    path: str,
+    mode: str,
+    files: Sequence[Tuple[str, Stamp]],
+    compact: CompactSystem,
+) -> bool:
+    """
+    Save the network compiled from `path` and the files it was read from
+    Args:
+        files: Each file read, with its stamp taken before it was read.
+    Returns:
+        False if a file changed since it was read: the network may not
+        match it, so nothing is stored.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    target = _cache_path(cache_dir, path, mode)
+    fd, temp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<I", VERSION))
+            file.write(struct.pack("<I", len(files)))
+            fresh = all(_write_source(file, *source) for source in files)
+            if fresh:
+                _write_network(file, compact)
+        if not fresh:
+            os.unlink(temp)
+            return False
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return True
+
+
+def _cache_path(cache_dir: str, path: str, mode: str) -> str:
+    key = sha256(f"{mode}\0{pathfunc.abspath(path)}".encode()).hexdigest()
+    return pathfunc.join(cache_dir, f"{key}.bin")
+
+
+def _file_hash(path: str) -> bytes:
+    digest = sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _is_fresh(source: _Source) -> bool:
+    path, mtime_ns, size, digest = source
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    return _file_hash(path) == digest
+
+
+def _write_source(file: BinaryIO, path: str, stamp: Stamp) -> bool:
+    """Write the entry of `path`, unless it changed since `stamp`"""
+    try:
+        digest = _file_hash(path)
+        # Unchanged from before it was read to after it was hashed: the hash
+        # is the one of the content parsed
+        if file_stamp(path) != stamp:
+            return False
+    except OSError:
+        return False
+    encoded = pathfunc.abspath(path).encode()
+    file.write(struct.pack("<I", len(encoded)))
+    file.write(encoded)
+    file.write(struct.pack("<qq", *stamp))
+    file.write(digest)
+    return True
+
+
+def _read_sources(file: BinaryIO) -> List[_Source]:
+    (count,) = _unpack(file, "<I")
+    sources = []
+    for _ in range(count):
+        (length,) = _unpack(file, "<I")
+        path = _read(file, length).decode()
+        mtime_ns, size = _unpack(file, "<qq")
+        sources.append((path, mtime_ns, size, _read(file, 32)))
+    return sources
+
+
+def _write_network(file: BinaryIO, compact: CompactSystem) -> None:
+    write_snapshot(file, compact)
+
+
+def _read_network(file: BinaryIO) -> CompactSystem:
+    return CompactSystem(*read_snapshot(file))
+
+
+def _read(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise EOFError(f"Truncated cache file: {file.name}")
+    return data
+
+
+def _unpack(file: BinaryIO, fmt: str) -> Tuple[int, ...]:
+    return struct.unpack(fmt, _read(file, struct.calcsize(fmt)))
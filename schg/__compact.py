@@ -0,0 +1,479 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type, Union
+import mmap
+import os
+import tempfile
+from .__base import (
+    LinkError,
+    OffLoad,
+    OnLoad,
+    SCHGError,
+    State,
+    Switch,
+    SwitchingError,
+    System,
+)
+from .__snapshot import map_snapshot, read_snapshot, write_snapshot
+
+OFFLOAD = 1
+SUBSTATION = 2
+
+# [switches, links, substations] of an energized island
+_Island = List[int]
+
+
+class CompactSwitch(Switch):
+    """Lightweight view of a switch stored in a CompactSystem"""
+
+    __slots__ = ("_system", "_id")
+
+    def __init__(self, system: "CompactSystem", id: int) -> None:
+        self._system = system
+        self._id = id
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def type_sw(self) -> Type[Union[OnLoad, OffLoad]]:
+        if self._system.kinds[self._id] & OFFLOAD:
+            return OffLoad
+        return OnLoad
+
+    @property
+    def on_substation(self) -> bool:
+        return bool(self._system.kinds[self._id] & SUBSTATION)
+
+    @property
+    def name(self) -> str:
+        return self._system.names[self._id]
+
+    @property
+    def state(self) -> State:
+        return State(self._system.states[self._id])
+
+    @property
+    def _state(self) -> State:
+        return State(self._system.states[self._id])
+
+    @_state.setter
+    def _state(self, state: State) -> None:
+        self._system.states[self._id] = state.value
+
+    @property  # type: ignore[override]
+    def sys(self) -> "CompactSystem":
+        return self._system
+
+    @sys.setter
+    def sys(self, sys: Optional[System]) -> None:
+        raise AttributeError(f"{self} belongs to a CompactSystem")
+
+    @property
+    def ison(self) -> bool:
+        return self._system.states[self._id] == 1
+
+    def toggle_state(self) -> None:
+        """Try to toggle the switch
+
+        Raises:
+            SCHGError: Raises when some SwitchingError occurs
+        """
+        erros = self._notify()
+        if len(erros) > 0:
+            raise SCHGError(erros)
+        self._system.states[self._id] ^= 1
+        self._notify_commit()
+
+
+class CompactSystem:
+    """
+    Array-backed System with a fixed topology
+    Switches are interned to integer ids and the links are stored as CSR
+    arrays: the neighbors of switch `i` are
+    `indices[indptr[i]:indptr[i + 1]]`. Kinds (OFFLOAD | SUBSTATION bit
+    flags) and states are byte arrays, and the energized islands are kept
+    as a label per switch.
+    The topology arrays may also be read-only views over a memory-mapped
+    snapshot (see `load`).
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        kinds: Sequence[int],
+        states: bytearray,
+        indptr: Sequence[int],
+        indices: Sequence[int],
+        buffer: Optional[mmap.mmap] = None,
+    ) -> None:
+        self._buffer = buffer
+        self.names = names
+        self.kinds = kinds
+        self.states = states
+        self.indptr = indptr
+        self.indices = indices
+        self._index: Optional[Dict[str, int]] = None
+        self._label: Optional["array[int]"] = None
+        self._islands: Dict[int, _Island] = {}
+        self._next_label = 0
+        self._cycles = 0
+        self._heavy = 0
+
+    @classmethod
+    def from_links(
+        cls,
+        names: List[str],
+        kinds: bytearray,
+        states: bytearray,
+        links: Iterable[Tuple[int, int]],
+    ) -> "CompactSystem":
+        """Build the CSR arrays from (id, id) pairs
+
+        Raises:
+            SCHGError: Raises when some LinkError occurs
+        """
+        pairs: Set[Tuple[int, int]] = set()
+        for id1, id2 in links:
+            if id1 == id2 or names[id1] == names[id2]:
+                raise SCHGError([LinkError.SELF_LINKING])
+            if kinds[id1] & kinds[id2] & SUBSTATION and states[id1] and states[id2]:
+                raise SCHGError([LinkError.SUBSTATION_LINKING])
+            pairs.add((id1, id2) if id1 < id2 else (id2, id1))
+
+        indptr = array("q", [0]) * (len(names) + 1)
+        for id1, id2 in pairs:
+            indptr[id1 + 1] += 1
+            indptr[id2 + 1] += 1
+        for i in range(len(names)):
+            indptr[i + 1] += indptr[i]
+
+        indices = array("q", [0]) * (2 * len(pairs))
+        fill = array("q", indptr[:-1])
+        for id1, id2 in sorted(pairs):
+            indices[fill[id1]] = id2
+            fill[id1] += 1
+            indices[fill[id2]] = id1
+            fill[id2] += 1
+
+        return cls(names, kinds, states, indptr, indices)
+
+    @classmethod
+    def from_system(
+        cls, sys: System, switches: Optional[Iterable[Switch]] = None
+    ) -> "CompactSystem":
+        """
+        Args:
+            sys: The system to compact
+            switches: All the switches to keep, linked or not. Defaults to
+                the switches of `sys`.
+        """
+        if switches is None:
+            switches = sys.swicthes
+        else:
+            switches = sorted(switches, key=lambda sw: sw.name)
+        index = {sw.name: i for i, sw in enumerate(switches)}
+        kinds = bytearray(len(switches))
+        states = bytearray(len(switches))
+        for i, sw in enumerate(switches):
+            if isinstance(sw, OffLoad):
+                kinds[i] |= OFFLOAD
+            if sw.on_substation:
+                kinds[i] |= SUBSTATION
+            states[i] = sw.state.value
+
+        links = (
+            (index[link.switches[0].name], index[link.switches[1].name])
+            for link in sys._links
+        )
+        return cls.from_links([sw.name for sw in switches], kinds, states, links)
+
+    def to_system(self) -> System:
+        return self.build()[1]
+
+    def build(self) -> Tuple[Dict[str, Switch], System]:
+        """Create the Switch objects (unlinked ones included) and their System"""
+        switches: List[Switch] = []
+        for i, name in enumerate(self.names):
+            state = State(self.states[i])
+            if self.kinds[i] & OFFLOAD:
+                switches.append(OffLoad(name, state))
+            else:
+                on_substation = bool(self.kinds[i] & SUBSTATION)
+                switches.append(OnLoad(name, state, on_substation=on_substation))
+
+        sys = System()
+        indptr, indices = self.indptr, self.indices
+        sys.link_many(
+            (switches[i], switches[indices[k]])
+            for i in range(len(self.names))
+            for k in range(indptr[i], indptr[i + 1])
+            if i < indices[k]
+        )
+        return {sw.name: sw for sw in switches}, sys
+
+    def copy(self) -> "CompactSystem":
+        """Copy of the states, sharing the read-only topology arrays"""
+        return CompactSystem(
+            self.names,
+            self.kinds,
+            bytearray(self.states),
+            self.indptr,
+            self.indices,
+            self._buffer,
+        )
+
+    def save(self, path: str) -> None:
+        """Write a binary snapshot of the system to `path`, atomically"""
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, temp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                write_snapshot(file, self)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompactSystem":
+        """Load a snapshot written by `save`
+
+        Args:
+            path: The snapshot file
+            mmap: Map the file instead of reading it. The topology arrays are
+                then views over the file and are paged in on demand.
+        Raises:
+            ValueError: Raises when the file is not a supported snapshot
+        """
+        if mmap:
+            arrays, buffer = map_snapshot(path)
+            return cls(*arrays, buffer=buffer)
+        with open(path, "rb") as file:
+            return cls(*read_snapshot(file))
+
+    def __getstate__(self) -> Dict[str, object]:
+        # memoryviews over a mapped file can not be pickled
+        state = self.__dict__.copy()
+        if self._buffer is not None:
+            state["_buffer"] = None
+            state["kinds"] = bytearray(self.kinds)
+            state["indptr"] = array("q", self.indptr)
+            state["indices"] = array("q", self.indices)
+        return state
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def index(self, name: str) -> int:
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index[name]
+
+    def switch(self, name: str) -> CompactSwitch:
+        return CompactSwitch(self, self.index(name))
+
+    @property
+    def swicthes(self) -> List[CompactSwitch]:
+        ids = sorted(range(len(self.names)), key=self.names.__getitem__)
+        return [CompactSwitch(self, i) for i in ids]
+
+    def neighbors(self, sw: Switch) -> Set[CompactSwitch]:
+        """Switches linked to `sw`, regardless of their states"""
+        i = self.__id(sw)
+        return {
+            CompactSwitch(self, self.indices[k])
+            for k in range(self.indptr[i], self.indptr[i + 1])
+        }
+
+    def __id(self, sw: Switch) -> int:
+        if isinstance(sw, CompactSwitch) and sw.sys is self:
+            return sw.id
+        return self.index(sw.name)
+
+    def __explore(self, start: int, visited: Set[int], blocked: int = -1) -> _Island:
+        """Walk the energized island of `start`, skipping `blocked`"""
+        states, kinds = self.states, self.kinds
+        indptr, indices = self.indptr, self.indices
+        visited.add(start)
+        stack = [start]
+        switches = links = substations = 0
+        while stack:
+            current = stack.pop()
+            switches += 1
+            substations += kinds[current] & SUBSTATION != 0
+            for k in range(indptr[current], indptr[current + 1]):
+                next_id = indices[k]
+                if next_id == blocked or not states[next_id]:
+                    continue
+                links += 1
+                if next_id not in visited:
+                    visited.add(next_id)
+                    stack.append(next_id)
+        return [switches, links // 2, substations]
+
+    def __flood(self, start: int, blocked: int = -1) -> int:
+        """Give a new label to the energized island of `start`"""
+        assert self._label is not None
+        new_label = self._next_label
+        self._next_label += 1
+        members: Set[int] = set()
+        island = self.__explore(start, members, blocked)
+        for member in members:
+            self._label[member] = new_label
+        self.__add_island(new_label, island)
+        return new_label
+
+    def __add_island(self, label: int, island: _Island) -> None:
+        self._islands[label] = island
+        self._cycles += island[1] - island[0] + 1
+        self._heavy += island[2] > 1
+
+    def __pop_island(self, label: int) -> _Island:
+        island = self._islands.pop(label)
+        self._cycles -= island[1] - island[0] + 1
+        self._heavy -= island[2] > 1
+        return island
+
+    def __labels(self) -> "array[int]":
+        if self._label is None:
+            self._label = array("l", [-1]) * len(self.names)
+            self._islands.clear()
+            self._cycles = self._heavy = 0
+            for i in range(len(self.names)):
+                if self.states[i] and self._label[i] < 0:
+                    self.__flood(i)
+        return self._label
+
+    def __islands(self) -> List[_Island]:
+        visited: Set[int] = set()
+        return [
+            self.__explore(i, visited)
+            for i in range(len(self.names))
+            if self.states[i] and i not in visited
+        ]
+
+    def __neighbor_labels(self, i: int) -> List[int]:
+        label = self.__labels()
+        return [
+            label[self.indices[k]]
+            for k in range(self.indptr[i], self.indptr[i + 1])
+            if self.states[self.indices[k]]
+        ]
+
+    @property
+    def ismeshed(self) -> bool:
+        return any(links >= switches for switches, links, _ in self.__islands())
+
+    @property
+    def is_substations_connected(self) -> bool:
+        return any(substations > 1 for _, _, substations in self.__islands())
+
+    def offload_trying_on_load(self, sw: Switch) -> bool:
+        i = self.__id(sw)
+        if not self.kinds[i] & OFFLOAD:
+            return False
+        if self.states[i]:
+            return self._islands[self.__labels()[i]][2] > 0
+        return any(self._islands[lb][2] > 0 for lb in self.__neighbor_labels(i))
+
+    def inform_change(self, sw: Switch) -> List[SwitchingError]:
+        """Check the errors that toggling `sw` would cause"""
+        return self.check(self.__id(sw))
+
+    def check_toggles(self, switches: Iterable[Switch]) -> List[List[SwitchingError]]:
+        """Check the errors that toggling each switch alone would cause"""
+        return [self.check(self.__id(sw)) for sw in switches]
+
+    def check(self, i: int) -> List[SwitchingError]:
+        if self.states[i]:
+            causes_mesh, connects_substations = self.__check_opening(i)
+        else:
+            causes_mesh, connects_substations = self.__check_closing(i)
+
+        error = []
+        if causes_mesh:
+            error.append(SwitchingError.CAUSES_MESH)
+
+        if connects_substations:
+            error.append(SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION)
+
+        if self.offload_trying_on_load(CompactSwitch(self, i)):
+            error.append(SwitchingError.OFFLOAD_SWITCHING_ON_LOAD)
+
+        return error
+
+    def __check_closing(self, i: int) -> Tuple[bool, bool]:
+        labels = self.__neighbor_labels(i)
+        distinct = set(labels)
+        causes_mesh = self._cycles > 0 or len(labels) > len(distinct)
+        substations = int(self.kinds[i] & SUBSTATION != 0)
+        substations += sum(self._islands[label][2] for label in distinct)
+        connects_substations = self._heavy > 0 or substations > 1
+        return causes_mesh, connects_substations
+
+    def __check_opening(self, i: int) -> Tuple[bool, bool]:
+        switches, links, substations = self._islands[self.__labels()[i]]
+        own_cycles = links - switches + 1
+        own_heavy = substations > 1
+        pieces: Optional[List[_Island]] = None
+
+        causes_mesh = self._cycles > own_cycles
+        if not causes_mesh and own_cycles > 0:
+            pieces = self.__pieces(i)
+            causes_mesh = any(links >= switches for switches, links, _ in pieces)
+
+        connects_substations = self._heavy > own_heavy
+        if not connects_substations and own_heavy:
+            pieces = self.__pieces(i) if pieces is None else pieces
+            connects_substations = any(piece[2] > 1 for piece in pieces)
+
+        return causes_mesh, connects_substations
+
+    def __pieces(self, i: int) -> List[_Island]:
+        """Islands left when the energized switch `i` opens"""
+        visited = {i}
+        return [
+            self.__explore(self.indices[k], visited, blocked=i)
+            for k in range(self.indptr[i], self.indptr[i + 1])
+            if self.states[self.indices[k]] and self.indices[k] not in visited
+        ]
+
+    def commit_change(self, sw: Switch) -> None:
+        """Update the island labels after `sw` was toggled"""
+        if self._label is None:
+            return
+        i = self.__id(sw)
+        label = self._label
+        neighbors = [
+            self.indices[k]
+            for k in range(self.indptr[i], self.indptr[i + 1])
+            if self.states[self.indices[k]]
+        ]
+
+        if not self.states[i]:
+            self.__pop_island(label[i])
+            label[i] = -1
+            new_labels: Set[int] = set()
+            for next_id in neighbors:
+                if label[next_id] not in new_labels:
+                    new_labels.add(self.__flood(next_id))
+            return
+
+        islands = {label[next_id]: next_id for next_id in neighbors}
+        keep = max(islands, key=lambda lb: self._islands[lb][0], default=-1)
+        merged = [1, len(neighbors), self.kinds[i] & SUBSTATION != 0]
+        for old_label, next_id in islands.items():
+            island = self.__pop_island(old_label)
+            merged = [merged[j] + island[j] for j in range(3)]
+            if old_label != keep:
+                members: Set[int] = set()
+                self.__explore(next_id, members, blocked=i)
+                for member in members:
+                    label[member] = keep
+
+        if keep < 0:
+            keep = self._next_label
+            self._next_label += 1
+        label[i] = keep
+        self.__add_island(keep, merged)
@@ -0,0 +1,101 @@
+from typing import Dict, Generic, Hashable, Iterable, Optional, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class DisjointSet(Generic[T]):
+    """Union-find with union by size and path halving.
+
+    `cycles` counts the unions refused because both items already shared a
+    root, i.e. the independent cycles closed by the edges seen so far. Every
+    set also sums the weights of its items, and `heavy` counts the sets whose
+    weight is greater than one. `source` keeps the first item of positive
+    weight of each set.
+    """
+
+    def __init__(self) -> None:
+        self._parent: Dict[T, T] = {}
+        self._size: Dict[T, int] = {}
+        self._weight: Dict[T, int] = {}
+        self._cycles: Dict[T, int] = {}
+        self._source: Dict[T, Optional[T]] = {}
+        self.cycles = 0
+        self.heavy = 0
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._parent
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def add(self, item: T, weight: int = 0) -> None:
+        if item in self._parent:
+            return
+        self._parent[item] = item
+        self._size[item] = 1
+        self._weight[item] = weight
+        self._cycles[item] = 0
+        self._source[item] = item if weight > 0 else None
+        if weight > 1:
+            self.heavy += 1
+
+    def find(self, item: T) -> T:
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def weight(self, item: T) -> int:
+        """Total weight of the set of `item`"""
+        return self._weight[self.find(item)]
+
+    def source(self, item: T) -> Optional[T]:
+        """An item of positive weight in the set of `item`, if any"""
+        return self._source[self.find(item)]
+
+    def cycles_of(self, item: T) -> int:
+        """Cycles closed inside the set of `item`"""
+        return self._cycles[self.find(item)]
+
+    def forget(self, items: Iterable[T]) -> None:
+        """Remove whole sets. `items` must hold every member of those sets"""
+        items = list(items)
+        for root in set(self.find(item) for item in items):
+            self.heavy -= self._weight[root] > 1
+            self.cycles -= self._cycles[root]
+        for item in items:
+            del self._parent[item]
+            self._size.pop(item, None)
+            self._weight.pop(item, None)
+            self._cycles.pop(item, None)
+            self._source.pop(item, None)
+
+    def union(self, item1: T, item2: T) -> bool:
+        """Merge the sets of both items
+
+        Returns:
+            False if they were already in the same set (a cycle was closed)
+        """
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            self.cycles += 1
+            self._cycles[root1] += 1
+            return False
+
+        if self._size[root1] < self._size[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._size[root1] += self._size.pop(root2)
+        self._cycles[root1] += self._cycles.pop(root2)
+        source = self._source.pop(root2)
+        if self._source[root1] is None:
+            self._source[root1] = source
+
+        weight1 = self._weight[root1]
+        weight2 = self._weight.pop(root2)
+        self.heavy -= (weight1 > 1) + (weight2 > 1)
+        self._weight[root1] = weight1 + weight2
+        self.heavy += weight1 + weight2 > 1
+        return True
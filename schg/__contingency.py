@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from .__base import SwitchingError, System
+from .__compact import CompactSwitch, CompactSystem
+
+Operation = Union[str, Tuple[str, str]]
+Report = Dict[Operation, List[SwitchingError]]
+
+_snapshot: Optional[CompactSystem] = None
+
+
+def screen_contingencies(
+    sys: Union[System, CompactSystem],
+    switches: Optional[Iterable[str]] = None,
+    pairs: Iterable[Tuple[str, str]] = (),
+    *,
+    max_workers: Optional[int] = None,
+) -> Report:
+    """Check every single-switch (and two-switch) operation of a system
+
+    The system is snapshotted into a CompactSystem, which is sent once to
+    each worker process. `sys` itself is never modified.
+
+    Args:
+        sys: The system to screen
+        switches: Names of the switches to toggle alone. Defaults to all.
+        pairs: Names of switches toggled one after the other
+        max_workers: Worker processes. 0 screens in this process.
+    Returns:
+        The SwitchingErrors of each operation, keyed by the switch name (or
+        by the pair of names). For a pair, the errors are the ones of the
+        first step that fails.
+    """
+    if isinstance(sys, CompactSystem):
+        snapshot = sys.copy()
+    else:
+        snapshot = CompactSystem.from_system(sys)
+    if switches is None:
+        switches = snapshot.names
+    operations: List[Operation] = list(switches)
+    operations += [(name1, name2) for name1, name2 in pairs]
+    ops = [
+        tuple(snapshot.index(name) for name in _names(operation))
+        for operation in operations
+    ]
+
+    workers = (cpu_count() or 1) if max_workers is None else max_workers
+    if workers < 1 or len(ops) < 2:
+        return dict(zip(operations, _screen(snapshot, ops)))
+
+    size = -(-len(ops) // (workers * 4))
+    chunks = [ops[i : i + size] for i in range(0, len(ops), size)]
+    results: List[List[SwitchingError]] = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(snapshot,),
+    ) as executor:
+        for chunk in executor.map(_screen_chunk, chunks):
+            results += chunk
+    return dict(zip(operations, results))
+
+
+def _names(operation: Operation) -> Tuple[str, ...]:
+    if isinstance(operation, str):
+        return (operation,)
+    return operation
+
+
+def _init_worker(snapshot: CompactSystem) -> None:
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _screen_chunk(ops: List[Tuple[int, ...]]) -> List[List[SwitchingError]]:
+    assert _snapshot is not None
+    return _screen(_snapshot, ops)
+
+
+def _screen(
+    snapshot: CompactSystem, ops: Sequence[Tuple[int, ...]]
+) -> List[List[SwitchingError]]:
+    results = []
+    for op in ops:
+        applied: List[int] = []
+        errors: List[SwitchingError] = []
+        for step, i in enumerate(op):
+            errors = snapshot.check(i)
+            # Only toggle for the next steps: after the last one, the
+            # revert would relabel whole islands for nothing
+            if len(errors) > 0 or step == len(op) - 1:
+                break
+            _toggle(snapshot, i)
+            applied.append(i)
+        for i in reversed(applied):
+            _toggle(snapshot, i)
+        results.append(errors)
+    return results
+
+
+def _toggle(snapshot: CompactSystem, i: int) -> None:
+    snapshot.states[i] ^= 1
+    snapshot.commit_change(CompactSwitch(snapshot, i))
@@ -1,7 +1,8 @@
-from typing import Dict
-from .__base import OffLoad, Switch, System
-from .__parser import get_raws
-from .__parser import redirect_handler
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type, Union
+from .__base import LinkError, OffLoad, OnLoad, SCHGError, State, Switch, System
+from .__cache import load_cache, store_cache
+from .__compact import CompactSystem
+from .__parser import Deck, collect_raws, read_deck, stale_files
 
 
 def _get_name_dss(cmd: str) -> str:
@@ -14,6 +15,14 @@ def _get_name_dss(cmd: str) -> str:
         raise ValueError(f"No name founded on :{cmd}")
 
 
+def _new_switch(
+    type_sw: Type[Union[OnLoad, OffLoad]], name: str, state: State, onsub: bool
+) -> Switch:
+    if type_sw is OffLoad:
+        return OffLoad(name, state)
+    return OnLoad(name, state, on_substation=onsub)
+
+
 class FromDSS:
     """
     Parser from .dss files
@@ -22,28 +31,150 @@ class FromDSS:
         new line.name \\ schg: OnLoad ON SUBSTATION  sw1name sw2name sw3name...;
     """
 
-    def __init__(self, path: str):
-        cmds = redirect_handler(path)
-        __raws = get_raws(cmds, _get_name_dss)
-        self.switches: Dict[str, Switch] = {}
+    def __init__(
+        self,
+        path: str,
+        *,
+        fast: bool = False,
+        cache_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            path: The path to the .dss file.
+            fast: Memory-map the files and only parse the lines tagged with
+                `schg:`, instead of every command.
+            cache_dir: If given, the compiled network is cached in this
+                directory until the .dss file or a redirected one changes.
+            workers: If greater than 1, the redirected files are read by this
+                many threads. The result is the same as the sequential read.
+        """
+        self._path = path
+        self._fast = fast
+        self._cache_dir = cache_dir
+        self._workers = workers
+        # The definitions of each file read, kept for reload()
+        self._deck: Optional[Deck] = None
+        self.switches: Dict[str, Switch]
+        if cache_dir is not None:
+            compact = load_cache(cache_dir, path, self._mode)
+            if compact is not None:
+                self.switches, self.sys = compact.build()
+                return
+
+        self._deck = {}
+        files: List[str] = []
+        __raws = collect_raws(self.__read(self._deck, files))
+        self.switches = {}
         self.sys = System()
         for __raw in __raws.values():
-            sw = None
-            if __raw.type_sw is OffLoad:
-                sw = __raw.type_sw(__raw.name, __raw.state)
-            else:
-                sw = __raw.type_sw(
-                    __raw.name,
-                    __raw.state,
-                    on_substation=__raw.onsub,
-                )  # type: ignore
-            self.switches[__raw.name] = sw
+            self.switches[__raw.name] = _new_switch(
+                __raw.type_sw, __raw.name, __raw.state, __raw.onsub
+            )
+
+        self.sys.link_many(
+            (self.switches[__raw.name], self.switches[link])
+            for __raw in __raws.values()
+            for link in __raw.links
+        )
+
+        self.__store(files)
+
+    @property
+    def _mode(self) -> str:
+        return "dss-fast" if self._fast else "dss"
+
+    def reload(self) -> List[str]:
+        """
+        Re-read the files changed since they were read and update `sys`
+        Only the changed (or newly redirected) files are parsed again. The
+        switches keep their objects unless their type or substation flag
+        changed, their states follow the files, and the links are added or
+        removed in place. A FromDSS loaded from the cache does not know its
+        files, so its first reload reads them all.
+        Returns:
+            The files read.
+        Raises:
+            SCHGError: Raises when some LinkError occurs. Nothing is changed.
+            ValueError: Raises when a definition is invalid. Nothing is changed.
+        """
+        if self._deck is None:
+            deck: Deck = {}
+        else:
+            stale = stale_files(self._deck)
+            if len(stale) == 0:
+                return []
+            deck = {
+                path: entry for path, entry in self._deck.items() if path not in stale
+            }
+        known = set(deck)
+        files: List[str] = []
+        __raws = collect_raws(self.__read(deck, files))
+        self.__apply(__raws)
+        self._deck = {path: deck[path] for path in files}
+        self.__store(files)
+        return [path for path in dict.fromkeys(files) if path not in known]
 
+    def __read(self, deck: Deck, files: List[str]) -> Iterator[Any]:
+        return read_deck(
+            self._path,
+            _get_name_dss,
+            deck,
+            fast=self._fast,
+            files=files,
+            workers=self._workers,
+        )
+
+    def __store(self, files: List[str]) -> None:
+        if self._cache_dir is not None and self._deck is not None:
+            compact = CompactSystem.from_system(self.sys, self.switches.values())
+            # The stamps taken when the files were read
+            sources = [(path, self._deck[path][0]) for path in files]
+            store_cache(self._cache_dir, self._path, self._mode, sources, compact)
+
+    def __apply(self, __raws: Dict[str, Any]) -> None:
+        switches: Dict[str, Switch] = {}
+        for name, __raw in __raws.items():
+            sw = self.switches.get(name)
+            if (
+                sw is None
+                or type(sw) is not __raw.type_sw
+                or sw.on_substation != __raw.onsub
+            ):
+                sw = _new_switch(__raw.type_sw, name, __raw.state, __raw.onsub)
+            switches[name] = sw
+
+        pairs: Set[Tuple[str, str]] = set()
         for __raw in __raws.values():
-            sw1 = self.switches[__raw.name]
             for link in __raw.links:
-                sw2 = self.switches[link]
-                self.sys.link(sw1, sw2)
+                pair = sorted((__raw.name, link))
+                pairs.add((pair[0], pair[1]))
+        for name1, name2 in pairs:
+            if name1 == name2:
+                raise SCHGError([LinkError.SELF_LINKING])
+            raw1, raw2 = __raws[name1], __raws[name2]
+            if raw1.onsub and raw2.onsub and raw1.state == raw2.state == State.ON:
+                raise SCHGError([LinkError.SUBSTATION_LINKING])
+
+        for link in list(self.sys._links):
+            sw1, sw2 = link.switches
+            if (
+                switches.get(sw1.name) is not sw1
+                or switches.get(sw2.name) is not sw2
+                or (sw1.name, sw2.name) not in pairs
+            ):
+                self.sys.unlink(sw1, sw2)
+
+        for name, sw in switches.items():
+            state = __raws[name].state
+            if sw.state != state:
+                sw._state = state
+                if sw.sys is self.sys:
+                    self.sys.commit_change(sw)
+
+        self.sys.link_many((switches[name1], switches[name2]) for name1, name2 in pairs)
+        self.switches.clear()
+        self.switches.update(switches)
 
     def toggle_sw(self, name: str) -> None:
         self.switches[name.lower()].toggle_state()
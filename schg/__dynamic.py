@@ -0,0 +1,302 @@
+from random import Random
+from typing import Dict, Generic, Hashable, Iterator, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class _Node:
+    """Treap node of an Euler tour: a vertex, or an arc of a tree edge"""
+
+    __slots__ = (
+        "left",
+        "right",
+        "parent",
+        "priority",
+        "size",
+        "weight",
+        "extra",
+        "total_weight",
+        "total_extra",
+        "vertex",
+    )
+
+    def __init__(self, priority: float, vertex: object = None, weight: int = 0):
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.parent: Optional[_Node] = None
+        self.priority = priority
+        self.vertex = vertex
+        # Own values (vertices only): the weight and the non-tree edges
+        self.weight = weight
+        self.extra = 0
+        # Sums over the subtree
+        self.size = 1
+        self.total_weight = weight
+        self.total_extra = 0
+
+
+def _update(node: _Node) -> None:
+    size, weight, extra = 1, node.weight, node.extra
+    left, right = node.left, node.right
+    if left is not None:
+        size += left.size
+        weight += left.total_weight
+        extra += left.total_extra
+    if right is not None:
+        size += right.size
+        weight += right.total_weight
+        extra += right.total_extra
+    node.size, node.total_weight, node.total_extra = size, weight, extra
+
+
+def _size(node: Optional[_Node]) -> int:
+    return 0 if node is None else node.size
+
+
+def _root(node: _Node) -> _Node:
+    while node.parent is not None:
+        node = node.parent
+    return node
+
+
+def _index(node: _Node) -> int:
+    """Position of `node` in its tour"""
+    index = _size(node.left)
+    while node.parent is not None:
+        if node is node.parent.right:
+            index += _size(node.parent.left) + 1
+        node = node.parent
+    return index
+
+
+# The treaps are balanced with high probability, so the recursion of split
+# and merge stays around 3 * ln(n) deep.
+def _split(
+    node: Optional[_Node], count: int
+) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split a tour after its first `count` nodes"""
+    if node is None:
+        return None, None
+    if _size(node.left) >= count:
+        first, rest = _split(node.left, count)
+        node.left = rest
+        if rest is not None:
+            rest.parent = node
+        _update(node)
+        if first is not None:
+            first.parent = None
+        node.parent = None
+        return first, node
+    first, rest = _split(node.right, count - _size(node.left) - 1)
+    node.right = first
+    if first is not None:
+        first.parent = node
+    _update(node)
+    if rest is not None:
+        rest.parent = None
+    node.parent = None
+    return node, rest
+
+
+def _merge(first: Optional[_Node], second: Optional[_Node]) -> Optional[_Node]:
+    """Concatenate two tours"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first.priority > second.priority:
+        right = _merge(first.right, second)
+        first.right = right
+        if right is not None:
+            right.parent = first
+        _update(first)
+        return first
+    left = _merge(first, second.left)
+    second.left = left
+    if left is not None:
+        left.parent = second
+    _update(second)
+    return second
+
+
+class DynamicForest(Generic[T]):
+    """Fully dynamic connectivity with Euler-tour trees
+
+    A spanning forest of the graph is kept as Euler tours stored in treaps,
+    so linking and cutting tree edges take O(log n). The other edges are
+    kept aside as non-tree edges. When a tree edge is deleted, a replacement
+    is searched among the non-tree edges of the smaller side, descending
+    only into the parts of its tour that hold some: in a radial network
+    there is none, and the deletion stays O(log n).
+
+    As in DisjointSet, every vertex has a weight, `heavy` counts the trees
+    whose weight is greater than one, and `cycles` counts the non-tree
+    edges, i.e. the independent cycles of the graph.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        self._random = Random(seed)
+        self._vertices: Dict[T, _Node] = {}
+        self._arcs: Dict[Tuple[T, T], _Node] = {}
+        self._nontree: Dict[T, Set[T]] = {}
+        self.cycles = 0
+        self.heavy = 0
+
+    def __contains__(self, vertex: object) -> bool:
+        return vertex in self._vertices
+
+    def __len__(self) -> int:
+        return len(self._vertices)
+
+    def add_vertex(self, vertex: T, weight: int = 0) -> None:
+        if vertex in self._vertices:
+            return
+        self._vertices[vertex] = _Node(self._random.random(), vertex, weight)
+        self._nontree[vertex] = set()
+        self.heavy += weight > 1
+
+    def remove_vertex(self, vertex: T) -> None:
+        """Remove a vertex, once all its edges are deleted"""
+        node = self._vertices[vertex]
+        if _root(node).size > 1 or len(self._nontree[vertex]) > 0:
+            raise ValueError(f"{vertex} still has edges")
+        self.heavy -= node.weight > 1
+        del self._vertices[vertex]
+        del self._nontree[vertex]
+
+    def component(self, vertex: T) -> object:
+        """Key of the tree of `vertex`, valid until the next change"""
+        return _root(self._vertices[vertex])
+
+    def connected(self, vertex1: T, vertex2: T) -> bool:
+        return self.component(vertex1) is self.component(vertex2)
+
+    def weight(self, vertex: T) -> int:
+        """Total weight of the tree of `vertex`"""
+        return _root(self._vertices[vertex]).total_weight
+
+    def cycles_of(self, vertex: T) -> int:
+        """Non-tree edges inside the tree of `vertex`"""
+        return _root(self._vertices[vertex]).total_extra // 2
+
+    def source(self, vertex: T) -> Optional[T]:
+        """A vertex of positive weight in the tree of `vertex`, if any"""
+        node: Optional[_Node] = _root(self._vertices[vertex])
+        while node is not None and node.total_weight > 0:
+            if node.left is not None and node.left.total_weight > 0:
+                node = node.left
+            elif node.weight > 0:
+                return node.vertex  # type: ignore[return-value]
+            else:
+                node = node.right
+        return None
+
+    def insert_edge(self, vertex1: T, vertex2: T) -> None:
+        if vertex1 == vertex2:
+            raise ValueError(f"{vertex1} can't be linked to itself")
+        if self.connected(vertex1, vertex2):
+            self.__add_nontree(vertex1, vertex2)
+            return
+        weight1, weight2 = self.weight(vertex1), self.weight(vertex2)
+        self.heavy -= (weight1 > 1) + (weight2 > 1)
+        self.heavy += weight1 + weight2 > 1
+        self.__link(vertex1, vertex2)
+
+    def delete_edge(self, vertex1: T, vertex2: T) -> None:
+        if vertex2 in self._nontree[vertex1]:
+            self.__remove_nontree(vertex1, vertex2)
+            return
+
+        before = self.weight(vertex1)
+        inner, outer = self.__cut(vertex1, vertex2)
+        self.heavy -= before > 1
+        small = inner if _size(inner) <= _size(outer) else outer
+        replacement = self.__replacement(small)
+        if replacement is not None:
+            self.__remove_nontree(*replacement)
+            self.__link(*replacement)
+            self.heavy += before > 1
+        else:
+            self.heavy += _weight(inner) > 1
+            self.heavy += _weight(outer) > 1
+
+    def __add_nontree(self, vertex1: T, vertex2: T) -> None:
+        self._nontree[vertex1].add(vertex2)
+        self._nontree[vertex2].add(vertex1)
+        self.__add_extra(vertex1, 1)
+        self.__add_extra(vertex2, 1)
+        self.cycles += 1
+
+    def __remove_nontree(self, vertex1: T, vertex2: T) -> None:
+        self._nontree[vertex1].remove(vertex2)
+        self._nontree[vertex2].remove(vertex1)
+        self.__add_extra(vertex1, -1)
+        self.__add_extra(vertex2, -1)
+        self.cycles -= 1
+
+    def __add_extra(self, vertex: T, delta: int) -> None:
+        node: Optional[_Node] = self._vertices[vertex]
+        assert node is not None
+        node.extra += delta
+        while node is not None:
+            node.total_extra += delta
+            node = node.parent
+
+    def __reroot(self, vertex: T) -> Optional[_Node]:
+        """Rotate the tour of `vertex` so that it starts at `vertex`"""
+        node = self._vertices[vertex]
+        first, rest = _split(_root(node), _index(node))
+        return _merge(rest, first)
+
+    def __link(self, vertex1: T, vertex2: T) -> None:
+        arc12 = _Node(self._random.random())
+        arc21 = _Node(self._random.random())
+        self._arcs[(vertex1, vertex2)] = arc12
+        self._arcs[(vertex2, vertex1)] = arc21
+        tour1 = self.__reroot(vertex1)
+        tour2 = self.__reroot(vertex2)
+        _merge(_merge(_merge(tour1, arc12), tour2), arc21)
+
+    def __cut(self, vertex1: T, vertex2: T) -> Tuple[Optional[_Node], Optional[_Node]]:
+        """Remove a tree edge: ... arc12 inner arc21 ... splits the tour"""
+        arc1 = self._arcs.pop((vertex1, vertex2))
+        arc2 = self._arcs.pop((vertex2, vertex1))
+        root = _root(arc1)
+        index1, index2 = _index(arc1), _index(arc2)
+        if index1 > index2:
+            index1, index2 = index2, index1
+        before, rest = _split(root, index1)
+        middle, after = _split(rest, index2 - index1 + 1)
+        _, middle = _split(middle, 1)
+        inner, _ = _split(middle, _size(middle) - 1)
+        return inner, _merge(before, after)
+
+    def __replacement(self, tour: Optional[_Node]) -> Optional[Tuple[T, T]]:
+        """A non-tree edge leaving `tour`, searching only where there are some"""
+        stack = [tour] if tour is not None and tour.total_extra > 0 else []
+        while stack:
+            node = stack.pop()
+            if node.extra > 0:
+                vertex: T = node.vertex  # type: ignore[assignment]
+                for other in self._nontree[vertex]:
+                    if _root(self._vertices[other]) is not tour:
+                        return vertex, other
+            for child in (node.left, node.right):
+                if child is not None and child.total_extra > 0:
+                    stack.append(child)
+        return None
+
+    def vertices(self, vertex: T) -> Iterator[T]:
+        """The vertices of the tree of `vertex`"""
+        stack = [_root(self._vertices[vertex])]
+        while stack:
+            node = stack.pop()
+            if node.vertex is not None:
+                yield node.vertex  # type: ignore[misc]
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append(child)
+
+
+def _weight(node: Optional[_Node]) -> int:
+    return 0 if node is None else node.total_weight
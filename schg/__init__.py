@@ -7,8 +7,14 @@ from .__base import (  # noqa
     LinkError,
     SwitchingError,
     SCHGError,
+    SwitchingPlanError,
+    Validation,
 )
+from .__compact import CompactSwitch, CompactSystem  # noqa
+from .__contingency import screen_contingencies  # noqa
 from .__dss import FromDSS  # noqa
 from .__schg import FromFile  # noqa
+from .__stats import CheckEvent, CheckStats, Stats  # noqa
+from .__synthetic import generate_dss, generate_schg, iter_synthetic  # noqa
 
 __version__ = "0.1.0"
@@ -1,7 +1,27 @@
-from typing import Callable, Dict, List, Optional, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 from .__base import OffLoad, OnLoad, State, Switch
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from os import path as pathfunc
+import locale
+import mmap
+import os
+
+T = TypeVar("T")
 
 TAG = "schg:"
 OFF_LOAD_TAG = "offload"
@@ -15,57 +35,310 @@ OFF_TAG = "off"
 END_TAG = ";"
 
 
-def redirect_handler(path: str) -> List[str]:
+def redirect_handler(path: str, workers: Optional[int] = None) -> List[str]:
     """
-    If a redirect command is found, call the function recursively
+    Read all the commands of a file, following its redirects
     Args:
         path: The path to the file.
-        acc: A buffer to store the commands.
+        workers: Threads reading the redirected files (see iter_commands).
     Returns:
-        True if the file has a solve command.
+        The commands without comments and redirects.
+    """
+    return list(iter_commands(path, workers=workers))
+
+
+def iter_commands(
+    path: str, files: Optional[List[str]] = None, workers: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Stream the commands of a file, expanding each redirect where it is found
+    Args:
+        path: The path to the file.
+        files: If given, the paths of the files read are appended to it.
+        workers: If greater than 1, the redirected files are read by this
+            many threads. Each file is then read whole, and the commands are
+            still yielded in the sequential order.
+    Yields:
+        The commands without comments and redirects.
+    """
+    yield from __expand(path, __read_commands, files, workers)
+
+
+def scan_commands(
+    path: str,
+    tag: str = TAG,
+    files: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+) -> Iterator[str]:
     """
+    Memory-map a file and only decode the commands holding `tag`
+    The file is searched at the byte level (case-insensitively) for `tag`,
+    redirects and block comments, chunk by chunk. Only the lines found, plus
+    the `~` continuations of their command, are decoded and stripped.
+    Args:
+        path: The path to the file.
+        tag: The marker of the commands to keep.
+        files: If given, the paths of the files read are appended to it.
+        workers: If greater than 1, the redirected files are scanned by this
+            many threads, as in iter_commands.
+    Yields:
+        The commands holding `tag`, with redirects expanded in place.
+    """
+    read = partial(__read_scanned, tag=tag)
+    yield from __expand(path, read, files, workers)
+
+
+@dataclass
+class __Redirect:
+    path: str
+
+
+# The commands of a single file, with its redirects left unexpanded
+__Entries = Iterable[Union[str, __Redirect]]
+
+
+def __read_commands(path: str) -> __Entries:
+    head = pathfunc.split(path)[0]
     with open(path, "rt") as file:
-        lines = file.readlines()
+        for line in __remove_comments_dss(file):
+            if "redirect" in line.lower():
+                cmd = " ".join(line.split(" ")[1:]).strip()
+                yield __Redirect(pathfunc.join(head, cmd))
+            else:
+                yield line
 
-    commands = __remove_comments_dss(lines)
-    no_redirect_cmds = []
 
-    for line in commands:
-        if "redirect" in line.lower().strip():
-            cmd = " ".join(line.split(" ")[1:]).strip()
-            head = pathfunc.split(path)[0]
-            no_redirect_cmds += redirect_handler(pathfunc.join(head, cmd))
-        else:
-            no_redirect_cmds.append(line)
+def __read_scanned(path: str, tag: str) -> __Entries:
+    head = pathfunc.split(path)[0]
+    with open(path, "rb") as file:
+        if pathfunc.getsize(path) == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for cmd in __scan_mmap(data, tag):
+                if "redirect" in cmd.lower():
+                    redirect = " ".join(cmd.split(" ")[1:]).strip()
+                    yield __Redirect(pathfunc.join(head, redirect))
+                elif tag in cmd.lower():
+                    yield cmd
+
+
+def __expand(
+    path: str,
+    read: Callable[[str], Iterable[Union[T, __Redirect]]],
+    files: Optional[List[str]],
+    workers: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Expand the redirects of the entries read from `path`, in order
+    The redirect tree is walked with an explicit stack, so its depth is not
+    bounded by the recursion limit. A file redirecting to one of the files
+    being expanded raises a ValueError. Sequentially, each file is streamed
+    up to its first redirect, and the rest of it is read before descending,
+    so only one file is open at a time. With more than one worker, the files
+    are read whole on a thread pool: the redirects of a file are all
+    submitted as soon as the file is reached, so its siblings are read while
+    the first one is expanded.
+    """
+    executor = None
+    if workers is not None and workers > 1:
+        executor = ThreadPoolExecutor(max_workers=workers)
 
-    return no_redirect_cmds
+    def read_all(file_path: str) -> List[Union[T, __Redirect]]:
+        return list(read(file_path))
 
+    def expand(
+        entries: Iterable[Union[T, __Redirect]]
+    ) -> Tuple[Iterator[Union[T, __Redirect]], Optional[Iterator[Callable[[], Any]]]]:
+        """The entries of a file and, on the pool, its redirects submitted"""
+        if executor is None:
+            return iter(entries), None
+        redirects = [
+            executor.submit(read_all, entry.path).result
+            for entry in entries
+            if isinstance(entry, __Redirect)
+        ]
+        return iter(entries), iter(redirects)
 
-def __remove_comments_dss(list_cmd: List[str]) -> List[str]:
-    vanished: List[str] = []
+    try:
+        stack = [expand([__Redirect(path)])]
+        # The real paths of the files being expanded, below the root entry
+        opened: List[str] = []
+        active: Set[str] = set()
+        while stack:
+            entries, pending = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                if len(opened) > 0:
+                    active.remove(opened.pop())
+            elif isinstance(entry, __Redirect):
+                real = pathfunc.realpath(entry.path)
+                if real in active:
+                    raise ValueError(f"Redirect cycle: {entry.path}")
+                opened.append(real)
+                active.add(real)
+                if files is not None:
+                    files.append(entry.path)
+                if pending is None:
+                    # Read the rest of the file first: it is closed before
+                    # descending, so one file at a time is open
+                    stack[-1] = (iter(list(entries)), pending)
+                    stack.append(expand(read(entry.path)))
+                else:
+                    stack.append(expand(next(pending)()))
+            else:
+                yield entry
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def __scan_mmap(data: mmap.mmap, tag: str) -> Iterator[str]:
+    keys = (tag.lower().encode(), b"redirect")
+    encoding = locale.getpreferredencoding(False)
     in_a_comment = False
-    for cmd in list_cmd:
-        if cmd.strip().startswith("/*"):
+    # Start and opening of the lines that open or close a /* */ block
+    toggles: List[Tuple[int, bool]] = []
+    position = 0
+    for found in __find_markers(data, keys + (b"/*", b"*/")):
+        if found < position:
+            continue
+        start = data.rfind(b"\n", 0, found) + 1
+        end = __line_end(data, found)
+        position = end + 1
+        line = data[start:end].strip()
+
+        if __is_toggle(line):
+            in_a_comment = line.startswith(b"/*")
+            toggles.append((start, in_a_comment))
+        elif in_a_comment or __is_comment_line(line):
+            continue
+        elif any(key in line.lower() for key in keys):
+            lines = [line]
+            if line.startswith(b"~"):
+                lines = __previous_lines(data, start, toggles) + lines
+            position, in_a_comment = __next_lines(data, position, lines, toggles)
+            cmd = lines[0].decode(encoding)
+            for continuation in lines[1:]:
+                cmd += continuation[1:].decode(encoding)
+            yield cmd
+
+
+def __find_markers(
+    data: mmap.mmap, markers: Tuple[bytes, ...], chunk: int = 1 << 24
+) -> Iterator[int]:
+    """Sorted positions of the markers, searched case-insensitively by chunks"""
+    overlap = max(len(marker) for marker in markers) - 1
+    for offset in range(0, len(data), chunk):
+        lowered = data[offset : offset + chunk + overlap].lower()
+        found = []
+        for marker in markers:
+            index = lowered.find(marker)
+            while 0 <= index < chunk:
+                found.append(offset + index)
+                index = lowered.find(marker, index + 1)
+        yield from sorted(found)
+
+
+def __line_end(data: mmap.mmap, position: int) -> int:
+    end = data.find(b"\n", position)
+    return len(data) if end < 0 else end
+
+
+def __is_comment_line(line: bytes) -> bool:
+    return len(line) == 0 or line.startswith(b"!") or line.startswith(b"//")
+
+
+def __is_toggle(line: bytes) -> bool:
+    """Whether `line` opens or closes a /* */ block, as __remove_comments_dss"""
+    return line.startswith(b"/*") or line.endswith(b"*/")
+
+
+def __previous_lines(
+    data: mmap.mmap, start: int, toggles: List[Tuple[int, bool]]
+) -> List[bytes]:
+    """Head and continuations of the command continued at `start`
+
+    `toggles` holds the block comment lines before `start`: a line is in a
+    block when the last of them before it opens one.
+    """
+    lines: List[bytes] = []
+    last = len(toggles) - 1
+    end = start - 1
+    while end >= 0:
+        start = data.rfind(b"\n", 0, end) + 1
+        line = data[start:end].strip()
+        end = start - 1
+        while last >= 0 and toggles[last][0] >= start:
+            last -= 1
+        in_a_comment = last >= 0 and toggles[last][1]
+        if __is_toggle(line) or in_a_comment or __is_comment_line(line):
+            continue
+        lines.insert(0, line)
+        if not line.startswith(b"~"):
+            return lines
+    raise ValueError(f"Continuation without a command: {data[start:end]!r}")
+
+
+def __next_lines(
+    data: mmap.mmap,
+    position: int,
+    lines: List[bytes],
+    toggles: List[Tuple[int, bool]],
+) -> Tuple[int, bool]:
+    """Append the continuations found from `position`, even across comments
+
+    Returns:
+        Where they end, and whether a block comment is open there
+    """
+    in_a_comment = False
+    while position < len(data):
+        end = __line_end(data, position)
+        line = data[position:end].strip()
+        if __is_toggle(line):
+            in_a_comment = line.startswith(b"/*")
+            toggles.append((position, in_a_comment))
+        elif in_a_comment or __is_comment_line(line):
+            pass
+        elif line.startswith(b"~"):
+            lines.append(line)
+        else:
+            break
+        position = end + 1
+    return position, in_a_comment
+
+
+def __remove_comments_dss(lines: Iterable[str]) -> Iterator[str]:
+    pending: Optional[str] = None
+    in_a_comment = False
+    for line in lines:
+        cmd = line.strip()
+        if cmd.startswith("/*"):
             in_a_comment = True
             continue
-        elif cmd.strip().endswith("*/"):
+        elif cmd.endswith("*/"):
             in_a_comment = False
             continue
         if in_a_comment:
             continue
-        elif cmd.strip().startswith("!"):
+        elif cmd.startswith("!"):
             continue
-        elif cmd.strip().startswith("//"):
+        elif cmd.startswith("//"):
             continue
-        elif len(cmd.strip()) == 0:
+        elif len(cmd) == 0:
             continue
 
-        if cmd.strip().startswith("~"):
-            vanished[-1] += cmd.strip()[1:]
+        if cmd.startswith("~"):
+            if pending is None:
+                raise ValueError(f"Continuation without a command: {cmd}")
+            pending += cmd[1:]
         else:
-            vanished.append(cmd.strip())
+            if pending is not None:
+                yield pending
+            pending = cmd
 
-    return vanished
+    if pending is not None:
+        yield pending
 
 
 # def __is_line(cmd: str) -> bool:
@@ -85,6 +358,7 @@ class __Raw:
     onsub: bool
     links: List[str]
     cmd: str
+    origin: str = ""
 
 
 def __get_definition(
@@ -141,14 +415,25 @@ def __get_definition(
     return __Raw(sw_type, name, sw_state, onsub, links, cmd)
 
 
+def iter_definitions(
+    list_cmd: Iterable[str], getname_func: Callable[[str], str], tag: str = TAG
+) -> Iterator[__Raw]:
+    for cmd in list_cmd:
+        __raw = __get_definition(cmd, getname_func, tag)
+        if __raw is not None:
+            yield __raw
+
+
 def get_raws(
-    list_cmd: List[str], getname_func: Callable[[str], str], tag: str = TAG
+    list_cmd: Iterable[str], getname_func: Callable[[str], str], tag: str = TAG
 ) -> Dict[str, __Raw]:
+    return collect_raws(iter_definitions(list_cmd, getname_func, tag))
+
+
+def collect_raws(raws: Iterable[__Raw]) -> Dict[str, __Raw]:
+    """Index the definitions by name (the last one wins) and check the links"""
     __raws: Dict[str, __Raw] = {}
-    for cmd in list_cmd:
-        __raw = __get_definition(cmd, getname_func, tag)
-        if __raw is None:
-            continue
+    for __raw in raws:
         __raws[__raw.name] = __raw
 
     for __raw in __raws.values():
@@ -157,3 +442,77 @@ def get_raws(
                 raise ValueError(f"Switch {sw} not found in link: {__raw.cmd}")
 
     return __raws
+
+
+# (mtime_ns, size) of a file when it was read
+Stamp = Tuple[int, int]
+
+# The definitions of each file of a tree, with its redirects unexpanded
+Deck = Dict[str, Tuple[Stamp, List[Union[__Raw, __Redirect]]]]
+
+
+def file_stamp(path: str) -> Stamp:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_deck(
+    path: str,
+    getname_func: Callable[[str], str],
+    deck: Deck,
+    *,
+    tag: str = TAG,
+    fast: bool = False,
+    files: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+) -> Iterator[__Raw]:
+    """
+    Stream the definitions of a file tree, only reading the files not in `deck`
+    The definitions of every file read are stored in `deck`, and each one
+    records the file it came from in `origin`.
+    Args:
+        path: The path to the root file.
+        getname_func: Extracts the switch name of a command.
+        deck: The files already read. Updated in place.
+        tag: The marker of the definitions.
+        fast: Memory-map the files and only decode the tagged lines.
+        files: If given, the paths of the files of the tree are appended to it.
+        workers: Threads reading the files (see iter_commands).
+    Yields:
+        The definitions, in the order of the sequential parser.
+    """
+
+    def read(file_path: str) -> List[Union[__Raw, __Redirect]]:
+        cached = deck.get(file_path)
+        if cached is not None:
+            return cached[1]
+        stamp = file_stamp(file_path)
+        if fast:
+            commands = __read_scanned(file_path, tag)
+        else:
+            commands = __read_commands(file_path)
+        entries: List[Union[__Raw, __Redirect]] = []
+        for cmd in commands:
+            if isinstance(cmd, __Redirect):
+                entries.append(cmd)
+                continue
+            __raw = __get_definition(cmd, getname_func, tag)
+            if __raw is not None:
+                __raw.origin = file_path
+                entries.append(__raw)
+        deck[file_path] = (stamp, entries)
+        return entries
+
+    yield from __expand(path, read, files, workers)
+
+
+def stale_files(deck: Deck) -> List[str]:
+    """The files of `deck` changed (or removed) since they were read"""
+    stale = []
+    for path, (stamp, _) in deck.items():
+        try:
+            if file_stamp(path) != stamp:
+                stale.append(path)
+        except OSError:
+            stale.append(path)
+    return stale
@@ -1,7 +1,8 @@
-from typing import Dict
+from typing import Dict, List, Optional
 from .__base import OffLoad, Switch, System
-from .__parser import get_raws
-from .__parser import redirect_handler
+from .__cache import load_cache, store_cache
+from .__compact import CompactSystem
+from .__parser import Deck, collect_raws, read_deck
 
 
 def _get_name(cmd: str) -> str:
@@ -19,10 +20,34 @@ class FromFile:
         name OnLoad ON sw1name sw2name sw3name...
     """
 
-    def __init__(self, path: str):
-        cmds = redirect_handler(path)
-        __raws = get_raws(cmds, _get_name, "")
-        self.switches: Dict[str, Switch] = {}
+    def __init__(
+        self,
+        path: str,
+        *,
+        cache_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            path: The path to the .schg file.
+            cache_dir: If given, the compiled network is cached in this
+                directory until the .schg file or a redirected one changes.
+            workers: If greater than 1, the redirected files are read by this
+                many threads.
+        """
+        self.switches: Dict[str, Switch]
+        if cache_dir is not None:
+            compact = load_cache(cache_dir, path, "schg")
+            if compact is not None:
+                self.switches, self.sys = compact.build()
+                return
+
+        deck: Deck = {}
+        files: List[str] = []
+        __raws = collect_raws(
+            read_deck(path, _get_name, deck, tag="", files=files, workers=workers)
+        )
+        self.switches = {}
         self.sys = System()
         for __raw in __raws.values():
             sw = None
@@ -36,11 +61,16 @@ class FromFile:
                 )  # type: ignore
             self.switches[__raw.name] = sw
 
-        for __raw in __raws.values():
-            sw1 = self.switches[__raw.name]
-            for link in __raw.links:
-                sw2 = self.switches[link]
-                self.sys.link(sw1, sw2)
+        self.sys.link_many(
+            (self.switches[__raw.name], self.switches[link])
+            for __raw in __raws.values()
+            for link in __raw.links
+        )
+
+        if cache_dir is not None:
+            compact = CompactSystem.from_system(self.sys, self.switches.values())
+            sources = [(file_path, deck[file_path][0]) for file_path in files]
+            store_cache(cache_dir, path, "schg", sources, compact)
 
     def toggle_sw(self, name: str) -> None:
         self.switches[name.lower()].toggle_state()
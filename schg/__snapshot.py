@@ -0,0 +1,124 @@
+from array import array
+from typing import TYPE_CHECKING, BinaryIO, List, Sequence, Tuple
+import mmap
+import struct
+import sys
+
+if TYPE_CHECKING:
+    from .__compact import CompactSystem
+
+MAGIC = b"SCHGSNAP"
+VERSION = 1
+
+# magic, version, reserved, switches, names size, indices
+_HEADER = struct.Struct("<8sIIQQQ")
+_ALIGN = 8
+
+_Arrays = Tuple[List[str], Sequence[int], bytearray, Sequence[int], Sequence[int]]
+
+
+def write_snapshot(file: BinaryIO, compact: "CompactSystem") -> None:
+    """
+    Write a versioned binary snapshot of a CompactSystem
+    Layout (little-endian): header, the names joined by newlines, kinds,
+    states (each padded to 8 bytes), then indptr and indices as int64.
+    Raises:
+        ValueError: Raises when a name holds a newline
+    """
+    if any("\n" in name for name in compact.names):
+        raise ValueError("Switch names with newlines can't be saved")
+    names = "\n".join(compact.names).encode()
+    count = len(compact)
+    links = len(compact.indices)
+    file.write(_HEADER.pack(MAGIC, VERSION, 0, count, len(names), links))
+    for data in (names, bytes(compact.kinds), bytes(compact.states)):
+        file.write(data)
+        file.write(bytes(_padding(len(data))))
+    for values in (compact.indptr, compact.indices):
+        ints = array("q", values)
+        if sys.byteorder == "big":
+            ints.byteswap()
+        file.write(ints.tobytes())
+
+
+def read_snapshot(file: BinaryIO) -> _Arrays:
+    """Read a snapshot written by write_snapshot, copying its arrays"""
+    header = _read(file, _HEADER.size)
+    count, names_size, links = _parse_header(header)
+    body = _read(file, _body_size(count, names_size, links))
+    return _parse_body(memoryview(body), count, names_size, links, copy=True)
+
+
+def map_snapshot(path: str) -> Tuple[_Arrays, mmap.mmap]:
+    """
+    Memory-map a snapshot
+    Kinds, indptr and indices are views over the mapped file (zero-copy on
+    little-endian machines). The states are copied, so they can change.
+    Returns:
+        The arrays and the mapping, which must outlive them.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    count, names_size, links = _parse_header(view[: _HEADER.size])
+    if len(view) < _HEADER.size + _body_size(count, names_size, links):
+        raise ValueError(f"Truncated schg snapshot: {path}")
+    body = view[_HEADER.size :]
+    copy = sys.byteorder == "big"
+    return _parse_body(body, count, names_size, links, copy), buffer
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGN
+
+
+def _body_size(count: int, names_size: int, links: int) -> int:
+    size = names_size + _padding(names_size)
+    size += 2 * (count + _padding(count))
+    return size + 8 * (count + 1 + links)
+
+
+def _parse_header(header: Sequence[int]) -> Tuple[int, int, int]:
+    if len(header) != _HEADER.size:
+        raise ValueError("Not a schg snapshot")
+    magic, version, _, count, names_size, links = _HEADER.unpack(bytes(header))
+    if magic != MAGIC:
+        raise ValueError("Not a schg snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported schg snapshot version: {version}")
+    return count, names_size, links
+
+
+def _parse_body(
+    body: memoryview, count: int, names_size: int, links: int, copy: bool
+) -> _Arrays:
+    position = 0
+
+    def take(size: int) -> memoryview:
+        nonlocal position
+        data = body[position : position + size]
+        position += size + _padding(size)
+        return data
+
+    names = bytes(take(names_size)).decode().split("\n") if count > 0 else []
+    kinds = take(count)
+    states = bytearray(take(count))
+    indptr = take(8 * (count + 1))
+    indices = take(8 * links)
+    if not copy:
+        return names, kinds, states, indptr.cast("q"), indices.cast("q")
+
+    ints = []
+    for data in (indptr, indices):
+        values = array("q", bytes(data))
+        if sys.byteorder == "big":
+            values.byteswap()
+        ints.append(values)
+    return names, bytearray(kinds), states, ints[0], ints[1]
+
+
+def _read(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise EOFError("Truncated schg snapshot")
+    return data
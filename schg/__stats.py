@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, TypeVar
+import threading
+
+R = TypeVar("R")
+
+
+class CheckEvent(NamedTuple):
+    """One measured check, as sent to the callback of Stats"""
+
+    check: str
+    seconds: float
+    nodes: int
+    edges: int
+
+
+@dataclass
+class CheckStats:
+    """Totals of a check. Nested checks are included in their caller's"""
+
+    calls: int = 0
+    seconds: float = 0.0
+    nodes: int = 0
+    edges: int = 0
+
+
+class Stats:
+    """
+    Counters of the checks of a System (see System.instrument)
+    `nodes` and `edges` are the switches and energized links traversed.
+    The hits count the answers found without a traversal: the energized
+    forest reused instead of rebuilt, and the islands answered by it.
+    """
+
+    def __init__(self, callback: Optional[Callable[[CheckEvent], None]] = None):
+        self.callback = callback
+        self.checks: Dict[str, CheckStats] = {}
+        self.forest_hits = 0
+        self.forest_misses = 0
+        self.island_hits = 0
+        self.island_misses = 0
+        # The [nodes, edges] of the checks running in each thread
+        self._local = threading.local()
+
+    @property
+    def forest_hit_rate(self) -> float:
+        return _rate(self.forest_hits, self.forest_misses)
+
+    @property
+    def island_hit_rate(self) -> float:
+        return _rate(self.island_hits, self.island_misses)
+
+    def reset(self) -> None:
+        self.checks.clear()
+        self.forest_hits = self.forest_misses = 0
+        self.island_hits = self.island_misses = 0
+
+    def _frames(self) -> List[List[int]]:
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _visit(self, nodes: int, edges: int) -> None:
+        frames = self._frames()
+        if len(frames) > 0:
+            frames[-1][0] += nodes
+            frames[-1][1] += edges
+
+    def _measure(
+        self, check: str, function: Callable[..., R], *args: Any, **kwargs: Any
+    ) -> R:
+        frames = self._frames()
+        frames.append([0, 0])
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = perf_counter() - start
+            nodes, edges = frames.pop()
+            if len(frames) > 0:
+                frames[-1][0] += nodes
+                frames[-1][1] += edges
+            totals = self.checks.get(check)
+            if totals is None:
+                totals = self.checks[check] = CheckStats()
+            totals.calls += 1
+            totals.seconds += seconds
+            totals.nodes += nodes
+            totals.edges += edges
+            if self.callback is not None:
+                self.callback(CheckEvent(check, seconds, nodes, edges))
+
+
+def _rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total > 0 else 0.0
@@ -0,0 +1,187 @@
+from random import Random
+from typing import Iterator, List, NamedTuple, Type, Union
+from os import path as pathfunc
+import os
+from .__base import OffLoad, OnLoad, State
+
+# Probability of a feeder switch following the previous one, otherwise it
+# branches off an earlier one
+CONTINUE = 0.7
+# Feeders started from each substation, on average
+FEEDERS = 8
+
+
+class Definition(NamedTuple):
+    name: str
+    type_sw: Type[Union[OnLoad, OffLoad]]
+    state: State
+    on_substation: bool
+    links: List[str]
+
+
+def iter_synthetic(
+    size: int,
+    seed: int = 0,
+    *,
+    substations: int = 1,
+    ties: float = 0.02,
+    onload: float = 0.4,
+) -> Iterator[Definition]:
+    """
+    Stream the switches of a random, valid distribution network
+    The substations feed radial feeders, and normally-open OnLoad tie
+    switches join random pairs of feeder switches. Each link is declared by
+    one end only, the one defined last. Memory use does not depend on `size`.
+    Args:
+        size: Number of switches.
+        seed: Seed of the random layout.
+        substations: Number of substations (OnLoad ON switches).
+        ties: Probability of each switch being a tie.
+        onload: Probability of a feeder switch being OnLoad.
+    Yields:
+        The switch definitions.
+    """
+    if size < substations:
+        raise ValueError(f"{size} switches can't hold {substations} substations")
+    rng = Random(seed)
+    for i in range(substations):
+        yield Definition(f"sub{i}", OnLoad, State.ON, True, [])
+
+    start_feeder = substations * FEEDERS / max(size, 1)
+    feeders = 0
+    n_ties = 0
+    for _ in range(size - substations):
+        if feeders >= 2 and rng.random() < ties:
+            ends = rng.sample(range(feeders), 2)
+            links = [f"sw{ends[0]}", f"sw{ends[1]}"]
+            yield Definition(f"tie{n_ties}", OnLoad, State.OFF, False, links)
+            n_ties += 1
+            continue
+
+        if feeders < substations:
+            parent = f"sub{feeders}"
+        elif rng.random() < start_feeder:
+            parent = f"sub{rng.randrange(substations)}"
+        elif rng.random() < CONTINUE:
+            parent = f"sw{feeders - 1}"
+        else:
+            parent = f"sw{rng.randrange(feeders)}"
+        type_sw = OnLoad if rng.random() < onload else OffLoad
+        yield Definition(f"sw{feeders}", type_sw, State.ON, False, [parent])
+        feeders += 1
+
+
+def _definition(sw: Definition) -> str:
+    type_sw = "OnLoad" if sw.type_sw is OnLoad else "OffLoad"
+    substation = " substation" if sw.on_substation else ""
+    return f"{type_sw} {sw.state}{substation} {' '.join(sw.links)}".strip()
+
+
+def generate_schg(
+    path: str,
+    size: int,
+    seed: int = 0,
+    *,
+    substations: int = 1,
+    ties: float = 0.02,
+    onload: float = 0.4,
+) -> None:
+    """
+    Write a synthetic network (see iter_synthetic) as a .schg file
+    """
+    switches = iter_synthetic(
+        size, seed, substations=substations, ties=ties, onload=onload
+    )
+    with open(path, "wt") as file:
+        for sw in switches:
+            file.write(f"{sw.name} {_definition(sw)}\n")
+
+
+def generate_dss(
+    folder: str,
+    size: int,
+    seed: int = 0,
+    *,
+    substations: int = 1,
+    ties: float = 0.02,
+    onload: float = 0.4,
+    per_file: int = 10_000,
+    fanout: int = 8,
+    loads: float = 0.5,
+) -> str:
+    """
+    Write a synthetic network (see iter_synthetic) as an annotated .dss deck
+    The switches are split in files of `per_file` lines, placed in a tree of
+    folders, `fanout` entries per folder. Each folder has a `redirects.dss`
+    redirecting to its entries, and `master.dss` redirects to the root one.
+    Args:
+        folder: Where to write the deck.
+        size: Number of switches.
+        seed: Seed of the random layout.
+        substations, ties, onload: The layout, as in iter_synthetic.
+        per_file: Switches per file.
+        fanout: Entries per folder of the redirect tree.
+        loads: Probability of a load being defined after each switch, as
+            the commands without `schg:` a real deck mostly holds.
+    Returns:
+        The path of the master file.
+    """
+    if fanout < 2:
+        raise ValueError("The fanout of the redirect tree must be at least 2")
+    files = max(1, -(-size // per_file))
+    depth = 1
+    while fanout**depth < files:
+        depth += 1
+
+    rng = Random(seed)
+    switches = iter_synthetic(
+        size, seed, substations=substations, ties=ties, onload=onload
+    )
+    for index in range(files):
+        path = pathfunc.join(folder, *_digits(index, fanout, depth)) + ".dss"
+        os.makedirs(pathfunc.dirname(path), exist_ok=True)
+        with open(path, "wt") as file:
+            for _, sw in zip(range(per_file), switches):
+                file.write(
+                    f"New Line.{sw.name} Phases=3 Bus1={sw.name}_a "
+                    f"Bus2={sw.name}_b Length=0.1 Units=km\n"
+                    f"~ LineCode=mtx601 // schg: {_definition(sw)}\n"
+                )
+                if rng.random() < loads:
+                    file.write(
+                        f"New Load.{sw.name} Bus1={sw.name}_b Phases=3 "
+                        f"kV=13.8 kW={rng.randrange(10, 500)} PF=0.9\n"
+                    )
+
+    # One redirects.dss per folder of the tree, listing its entries in order
+    for level in range(depth):
+        # Leaf files under each entry of this level
+        leaves = fanout ** (depth - level - 1)
+        for prefix in range(-(-files // (leaves * fanout))):
+            parent = pathfunc.join(folder, *_digits(prefix, fanout, level))
+            with open(pathfunc.join(parent, "redirects.dss"), "wt") as file:
+                for child in range(fanout):
+                    if (prefix * fanout + child) * leaves >= files:
+                        break
+                    if level < depth - 1:
+                        file.write(f"Redirect {child}/redirects.dss\n")
+                    else:
+                        file.write(f"Redirect {child}.dss\n")
+
+    master = pathfunc.join(folder, "master.dss")
+    with open(master, "wt") as file:
+        file.write("Clear\n")
+        file.write("New Circuit.synthetic basekV=13.8 pu=1.0 phases=3\n")
+        file.write("New LineCode.mtx601 nphases=3 R1=0.0656 X1=0.1875 Units=km\n")
+        file.write("Redirect redirects.dss\n")
+        file.write("Set VoltageBases=[13.8]\nCalcVoltageBases\n")
+    return master
+
+
+def _digits(index: int, fanout: int, depth: int) -> List[str]:
+    """The path of `index` in a tree of `depth` levels of `fanout` entries"""
+    digits = []
+    for _ in range(depth):
+        index, digit = divmod(index, fanout)
+        digits.append(str(digit))
+    return digits[::-1]
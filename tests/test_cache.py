@@ -0,0 +1,84 @@
+from importlib import import_module
+from pathlib import Path
+from typing import Any
+from shutil import copytree
+import pytest
+from schg import FromDSS, FromFile, State
+from schg.__cache import load_cache
+from schg.__parser import collect_raws
+
+
+def _fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("The network must come from the cache")
+
+
+def test_dss_cache_hit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    copytree("tests/13bus", tmp_path / "13bus")
+    path = str(tmp_path / "13bus" / "IEEE13Nodeckt.dss")
+    cache_dir = str(tmp_path / "cache")
+
+    expected = FromDSS(path, cache_dir=cache_dir)
+    assert load_cache(cache_dir, path, "dss") is not None
+
+    monkeypatch.setattr(import_module("schg.__dss"), "read_deck", _fail)
+    sys = FromDSS(path, cache_dir=cache_dir)
+    assert sys.switches == expected.switches
+    assert sys.sys.links == expected.sys.links
+
+
+def test_cache_invalidated_by_redirected_file(tmp_path: Path) -> None:
+    (tmp_path / "master.dss").write_text("Redirect switches.dss\n")
+    switches = tmp_path / "switches.dss"
+    switches.write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2\n"
+        "New Line.SW2 // schg: OffLoad ON SW1\n"
+    )
+    path = str(tmp_path / "master.dss")
+    cache_dir = str(tmp_path / "cache")
+
+    FromDSS(path, cache_dir=cache_dir)
+    switches.write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2\n"
+        "New Line.SW2 // schg: OffLoad OFF SW1\n"
+    )
+    sys = FromDSS(path, cache_dir=cache_dir)
+
+    assert sys.switches["sw2"].state == State.OFF
+
+
+def test_schg_cache_keeps_unlinked_switches(tmp_path: Path) -> None:
+    path = tmp_path / "master.schg"
+    path.write_text(
+        "sw1 OnLoad ON substation sw2\nsw2 OffLoad ON sw1\nsw3 OnLoad OFF substation\n"
+    )
+    cache_dir = str(tmp_path / "cache")
+
+    expected = FromFile(str(path), cache_dir=cache_dir)
+    sys = FromFile(str(path), cache_dir=cache_dir)
+
+    assert set(sys.switches) == {"sw1", "sw2", "sw3"}
+    assert sys.switches == expected.switches
+
+
+def test_cache_skipped_when_a_file_changes_while_parsed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "master.dss").write_text("Redirect switches.dss\n")
+    switches = tmp_path / "switches.dss"
+    switches.write_text("New Line.SW1 // schg: OnLoad ON substation\n")
+    path = str(tmp_path / "master.dss")
+    cache_dir = str(tmp_path / "cache")
+
+    def collect_then_edit(*args: Any) -> Any:
+        # Edited once read, before the cache is stored
+        raws = collect_raws(*args)
+        switches.write_text("New Line.SW1 // schg: OnLoad OFF substation\n")
+        return raws
+
+    monkeypatch.setattr(import_module("schg.__dss"), "collect_raws", collect_then_edit)
+    sys = FromDSS(path, cache_dir=cache_dir)
+    monkeypatch.undo()
+
+    assert sys.switches["sw1"].state == State.ON
+    assert load_cache(cache_dir, path, "dss") is None
+    assert FromDSS(path, cache_dir=cache_dir).switches["sw1"].state == State.OFF
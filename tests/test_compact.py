@@ -0,0 +1,80 @@
+from random import Random
+from schg import (
+    CompactSystem,
+    OffLoad,
+    OnLoad,
+    SCHGError,
+    State,
+    SwitchingError,
+    System,
+    Validation,
+)
+from tests.test_schg import _random_system
+
+
+def test_views_match_switches() -> None:
+    sys, switches = _random_system(Random(0))
+    compact = CompactSystem.from_system(sys)
+
+    assert compact.swicthes == sys.swicthes
+    for sw in switches:
+        view = compact.switch(sw.name)
+        assert view.state == sw.state
+        assert view.on_substation == sw.on_substation
+        assert view.type_sw is type(sw)
+        assert compact.neighbors(view) == sys.neighbors(sw)
+
+
+def test_toggle_view() -> None:
+    sw0 = OnLoad("sw0", State.ON, on_substation=True)
+    sw1 = OffLoad("sw1", State.ON)
+    sw2 = OnLoad("sw2", State.OFF)
+    sys = System()
+    sys.link(sw0, sw1)
+    sys.link(sw1, sw2)
+    compact = CompactSystem.from_system(sys)
+
+    compact.switch("sw2").toggle_state()
+    assert compact.switch("sw2").state == State.ON
+    try:
+        compact.switch("sw1").toggle_state()
+        assert False
+    except SCHGError as e:
+        assert e.args[0] == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
+
+
+def test_compact_validation_matches_full() -> None:
+    rng = Random(7)
+    for _ in range(20):
+        sys, switches = _random_system(rng)
+        sys.validation = Validation.FULL
+        compact = CompactSystem.from_system(sys)
+        for _ in range(100):
+            sw = rng.choice(switches)
+            expected = sys.inform_change(sw)
+            assert compact.inform_change(sw) == expected
+
+            if len(expected) == 0 or rng.random() < 0.3:
+                sw._state = State(not sw.state.value)
+                sys.commit_change(sw)
+                view = compact.switch(sw.name)
+                view._state = sw.state
+                compact.commit_change(view)
+
+        assert compact.ismeshed == sys.ismeshed
+        assert compact.is_substations_connected == sys.is_substations_connected
+
+
+def test_to_system_round_trip() -> None:
+    sys, _ = _random_system(Random(3))
+    copy = CompactSystem.from_system(sys).to_system()
+
+    assert copy.swicthes == sys.swicthes
+    assert copy.links == sys.links
+
+
+def test_check_toggles() -> None:
+    sys, switches = _random_system(Random(11))
+    compact = CompactSystem.from_system(sys)
+
+    assert compact.check_toggles(switches) == sys.check_toggles(switches)
@@ -0,0 +1,36 @@
+from random import Random
+from schg import CompactSystem, screen_contingencies
+from tests.test_schg import _random_system
+
+
+def test_single_switch_report() -> None:
+    sys, switches = _random_system(Random(13))
+    expected = dict(zip((sw.name for sw in switches), sys.check_toggles(switches)))
+
+    assert screen_contingencies(sys, max_workers=0) == expected
+    assert screen_contingencies(sys, max_workers=2) == expected
+
+
+def test_pairs_report() -> None:
+    sys, switches = _random_system(Random(17))
+    pairs = [(sw1.name, sw2.name) for sw1, sw2 in zip(switches, switches[1:])]
+    states = [sw.state for sw in switches]
+
+    report = screen_contingencies(sys, [], pairs, max_workers=2)
+
+    assert report == screen_contingencies(sys, [], pairs, max_workers=0)
+    assert [sw.state for sw in switches] == states
+    for sw1, sw2 in zip(switches, switches[1:]):
+        errors = sys.validate_plan([sw1, sw2])
+        expected = [] if errors is None else errors.args[0]
+        assert report[(sw1.name, sw2.name)] == expected
+
+
+def test_compact_system_is_not_modified() -> None:
+    sys, _ = _random_system(Random(19))
+    compact = CompactSystem.from_system(sys)
+    states = bytes(compact.states)
+
+    screen_contingencies(compact, max_workers=0)
+
+    assert bytes(compact.states) == states
@@ -0,0 +1,63 @@
+from random import Random
+import pytest
+from schg import OffLoad, OnLoad, State, System, SwitchingError, Validation
+from tests.test_schg import _random_system
+
+
+def test_dynamic_validation_matches_full() -> None:
+    rng = Random(23)
+    for _ in range(20):
+        sys, switches = _random_system(rng, size=40)
+        for _ in range(150):
+            sw = rng.choice(switches)
+            sys.validation = Validation.FULL
+            expected = sys.inform_change(sw)
+            sys.validation = Validation.DYNAMIC
+            assert sys.inform_change(sw) == expected
+
+            # Also commit invalid toggles, so meshes and interconnections
+            # have to be split again
+            if len(expected) == 0 or rng.random() < 0.4:
+                sw._state = State(not sw.state.value)
+                sys.commit_change(sw)
+
+
+def test_dynamic_follows_links() -> None:
+    sub = OnLoad("sub", State.ON, on_substation=True)
+    sw0 = OffLoad("sw0", State.ON)
+    sw1 = OnLoad("sw1", State.ON)
+    sw2 = OnLoad("sw2", State.OFF)
+    sys = System(Validation.DYNAMIC)
+    sys.link(sub, sw0)
+    sys.link(sw0, sw1)
+
+    assert sys.inform_change(sw2) == []
+    sys.link(sw2, sub)
+    sys.link(sw2, sw1)
+    assert sys.inform_change(sw2) == [SwitchingError.CAUSES_MESH]
+
+    sys.unlink(sw0, sw1)
+    assert sys.inform_change(sw2) == []
+    sw2.toggle_state()
+    assert sys.inform_change(sw0) == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
+
+
+def test_dynamic_check_is_read_only(monkeypatch: pytest.MonkeyPatch) -> None:
+    sub = OnLoad("sub", State.ON, on_substation=True)
+    sw0 = OnLoad("sw0", State.ON)
+    sw1 = OnLoad("sw1", State.ON)
+    sw2 = OffLoad("sw2", State.ON)
+    sys = System(Validation.DYNAMIC)
+    sys.link_many([(sub, sw0), (sw0, sw1), (sw1, sw2), (sw2, sub)])
+    assert sys.inform_change(sw1) == []
+    dynamic = sys._dynamic
+    assert dynamic is not None
+
+    def fail(*args: object) -> None:
+        raise AssertionError("a check must not edit the DynamicForest")
+
+    monkeypatch.setattr(dynamic, "delete_edge", fail)
+    monkeypatch.setattr(dynamic, "insert_edge", fail)
+    # Opening any switch of the ring splits a meshed island
+    assert sys.inform_change(sw0) == []
+    assert sys.inform_change(sw2) == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
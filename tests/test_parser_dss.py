@@ -1,4 +1,8 @@
-from schg import OffLoad, OnLoad, State, FromDSS, SCHGError, SwitchingError
+from schg import OffLoad, OnLoad, State, FromDSS, LinkError, SCHGError, SwitchingError
+from pathlib import Path
+from typing import List
+import pytest
+from schg.__parser import iter_commands, redirect_handler, scan_commands
 
 
 def test_all_switches() -> None:
@@ -43,3 +47,198 @@ def test_13bus() -> None:
         "671692": OffLoad("671692", State.ON),
     }
     assert sys.switches == expected
+
+
+def test_iter_commands_streams_redirects() -> None:
+    path = "tests/13bus/IEEE13Nodeckt.dss"
+    commands = iter_commands(path)
+
+    assert next(commands).lower() == "clear"
+    assert next(commands).lower() == "set defaultbasefrequency=60"
+    circuit = next(commands)
+    assert circuit.startswith("new circuit.IEEE13Nodeckt")
+    assert "MVAsc3=20000" in circuit
+    assert list(commands) == redirect_handler(path)[3:]
+    assert any(cmd.startswith("New linecode.mtx601") for cmd in redirect_handler(path))
+
+
+def test_scan_commands_matches_iter_commands(tmp_path: Path) -> None:
+    (tmp_path / "switches.dss").write_text(
+        "New Line.SW3 Phases=3 Bus1=a Bus2=b\n"
+        "! New Line.SW4 // schg: OnLoad ON SW3\n"
+        "~ r1=1e-4 // SCHG: OnLoad OFF SW2\n"
+        "New Line.SW7 Bus1=a Bus2=b\n"
+        "/* notes\n"
+        "~ ! schg: OnLoad ON SW7\n"
+        "*/\n"
+        "~ ! schg: OnLoad ON SW3;\n"
+        "New Line.SW8 // schg: OffLoad OFF SW7;\n"
+        "/* New Line.SW9\n"
+        "*/\n"
+        "~ ! schg: OnLoad OFF SW8;\n"
+    )
+    (tmp_path / "master.dss").write_text(
+        "Clear\n"
+        "New Line.SW1 Phases=3 // schg: OnLoad ON substation SW2\n"
+        "/* New Line.SW5 // schg: OnLoad ON SW1\n"
+        "New Line.SW6 // schg: OnLoad ON SW1\n"
+        "*/\n"
+        "New Line.SW2 Phases=3\n"
+        "\n"
+        "~ Bus1=c Bus2=d ! schg: OffLoad ON SW1 SW3;\n"
+        "~ r1=1e-4\n"
+        "Redirect switches.dss\n"
+    )
+    path = str(tmp_path / "master.dss")
+
+    expected = [cmd for cmd in iter_commands(path) if "schg:" in cmd.lower()]
+    assert list(scan_commands(path)) == expected
+    assert len(expected) == 5
+    assert FromDSS(path, fast=True).switches == FromDSS(path).switches
+
+
+def test_fast_13bus() -> None:
+    path = "tests/13bus/IEEE13Nodeckt.dss"
+    assert FromDSS(path, fast=True).switches == FromDSS(path).switches
+
+
+def test_parallel_redirects_keep_order(tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "deep.dss").write_text(
+        "New Line.SW4 // schg: OnLoad OFF SW3;\n"
+    )
+    (tmp_path / "a.dss").write_text(
+        "New Line.SW2 // schg: OffLoad ON SW1;\nRedirect sub/deep.dss\n"
+    )
+    (tmp_path / "b.dss").write_text("New Line.SW3 // schg: OnLoad ON SW2;\n")
+    (tmp_path / "master.dss").write_text(
+        "Clear\n"
+        "Redirect a.dss\n"
+        "New Line.SW1 // schg: OnLoad ON substation SW2;\n"
+        "Redirect b.dss\n"
+        "Redirect a.dss\n"
+    )
+    path = str(tmp_path / "master.dss")
+
+    for scan in (iter_commands, scan_commands):
+        files: List[str] = []
+        parallel_files: List[str] = []
+        expected = list(scan(path, files=files))
+        assert list(scan(path, files=parallel_files, workers=4)) == expected
+        assert parallel_files == files
+    assert len(files) == 6
+    assert FromDSS(path, workers=4).switches == FromDSS(path).switches
+
+
+def test_parallel_13bus() -> None:
+    path = "tests/13bus/IEEE13Nodeckt.dss"
+    assert redirect_handler(path, workers=4) == redirect_handler(path)
+
+
+def test_reload_applies_changed_files(tmp_path: Path) -> None:
+    (tmp_path / "master.dss").write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2;\n"
+        "Redirect feeder.dss\n"
+        "Redirect ties.dss\n"
+    )
+    feeder = tmp_path / "feeder.dss"
+    feeder.write_text(
+        "New Line.SW2 // schg: OffLoad ON SW1;\n"
+        "New Line.SW3 // schg: OnLoad ON SW2;\n"
+        "New Line.SW4 // schg: OnLoad ON SW3;\n"
+    )
+    (tmp_path / "ties.dss").write_text("New Line.SW5 // schg: OnLoad OFF SW3;\n")
+    path = str(tmp_path / "master.dss")
+    dss = FromDSS(path)
+    sys = dss.sys
+    before = dict(dss.switches)
+    assert dss.reload() == []
+
+    feeder.write_text(
+        "New Line.SW2 // schg: OffLoad ON SW1;\n"
+        "New Line.SW3 // schg: OffLoad OFF SW2;\n"
+        "New Line.SW6 // schg: OnLoad ON SW2;\n"
+    )
+    assert dss.reload() == [str(feeder)]
+
+    fresh = FromDSS(path)
+    assert dss.sys is sys
+    assert dss.switches == fresh.switches
+    assert dss.sys.links == fresh.sys.links
+    assert [sw.state for sw in dss.sys.swicthes] == [
+        sw.state for sw in fresh.sys.swicthes
+    ]
+    assert dss.switches["sw1"] is before["sw1"]
+    assert dss.switches["sw2"] is before["sw2"]
+    assert dss.switches["sw5"] is before["sw5"]
+    assert isinstance(dss.switches["sw3"], OffLoad)
+    assert before["sw4"].sys is None
+    assert dss.sys.ismeshed == fresh.sys.ismeshed
+    assert dss.sys.inform_change(dss.switches["sw5"]) == fresh.sys.inform_change(
+        fresh.switches["sw5"]
+    )
+
+
+def test_reload_rejects_invalid_links(tmp_path: Path) -> None:
+    (tmp_path / "master.dss").write_text("Redirect switches.dss\n")
+    switches = tmp_path / "switches.dss"
+    switches.write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2;\n"
+        "New Line.SW2 // schg: OnLoad OFF substation SW1;\n"
+    )
+    dss = FromDSS(str(tmp_path / "master.dss"))
+    links = dss.sys.links
+
+    switches.write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2;\n"
+        "New Line.SW2 // schg: OnLoad ON substation SW1;\n"
+    )
+    try:
+        dss.reload()
+        assert False
+    except SCHGError as e:
+        assert e.args[0] == [LinkError.SUBSTATION_LINKING]
+    assert dss.sys.links == links
+    assert dss.switches["sw2"].state == State.OFF
+
+
+def test_deep_redirect_chain(tmp_path: Path) -> None:
+    depth = 2000
+    for i in range(depth):
+        (tmp_path / f"f{i}.dss").write_text(
+            f"New Line.SW{i} // schg: OnLoad ON SW{i + 1};\nRedirect f{i + 1}.dss\n"
+        )
+    (tmp_path / f"f{depth}.dss").write_text(
+        f"New Line.SW{depth} // schg: OnLoad ON substation SW0;\n"
+    )
+    path = str(tmp_path / "f0.dss")
+
+    # Far fewer descriptors than files: only one file may be open at a time
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (256, hard))
+    try:
+        assert len(list(iter_commands(path))) == depth + 1
+        assert len(list(scan_commands(path))) == depth + 1
+        assert len(FromDSS(path).switches) == depth + 1
+        assert len(FromDSS(path, fast=True).switches) == depth + 1
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_redirect_cycles_are_rejected(tmp_path: Path) -> None:
+    (tmp_path / "master.dss").write_text(
+        "New Line.SW1 // schg: OnLoad ON substation SW2;\nRedirect master.dss\n"
+    )
+    (tmp_path / "a.dss").write_text("Redirect sub/b.dss\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.dss").write_text("Redirect ../a.dss\n")
+
+    for name in ("master.dss", "a.dss"):
+        path = str(tmp_path / name)
+        with pytest.raises(ValueError, match="Redirect cycle"):
+            list(iter_commands(path))
+        with pytest.raises(ValueError, match="Redirect cycle"):
+            list(scan_commands(path, workers=4))
+    with pytest.raises(ValueError, match="Redirect cycle"):
+        FromDSS(str(tmp_path / "master.dss"))
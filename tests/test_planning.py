@@ -0,0 +1,132 @@
+from itertools import permutations
+from random import Random
+from typing import List, Tuple
+from schg import OffLoad, OnLoad, SCHGError, State, Switch, System, Validation
+from tests.test_schg import _random_system
+
+
+def _faulted_system() -> Tuple[System, List[Switch]]:
+    """
+    sub0 - brk - sec1 - sec2 - x - y - tie - fb - sub1
+    The fault on sec1 is isolated by brk and sec1, leaving sec2 and y dead.
+    """
+    sub0 = OnLoad("sub0", State.ON, on_substation=True)
+    brk = OnLoad("brk", State.OFF)
+    sec1 = OffLoad("sec1", State.OFF)
+    sec2 = OnLoad("sec2", State.ON)
+    x = OffLoad("x", State.OFF)
+    y = OnLoad("y", State.ON)
+    tie = OnLoad("tie", State.OFF)
+    fb = OffLoad("fb", State.ON)
+    sub1 = OnLoad("sub1", State.ON, on_substation=True)
+    switches: List[Switch] = [sub0, brk, sec1, sec2, x, y, tie, fb, sub1]
+    sys = System()
+    sys.link_many(zip(switches, switches[1:]))
+    return sys, switches
+
+
+def test_restoration_plan() -> None:
+    sys, (_, brk, sec1, sec2, x, _, tie, _, sub1) = _faulted_system()
+
+    # x is OffLoad: it must close before the tie energizes it
+    plan = sys.restoration_plan([sec2], locked=[brk, sec1])
+
+    assert plan == [x, tie]
+    sys.apply_plan(plan)
+    assert sys.feeder(sec2) is sub1
+
+
+def test_restoration_plan_without_solution() -> None:
+    sys, (_, brk, sec1, sec2, _, _, tie, fb, _) = _faulted_system()
+
+    assert sys.restoration_plan([sec2], locked=[brk, sec1, tie]) is None
+    assert sys.restoration_plan([sec2], locked=[brk, sec1], max_steps=1) is None
+    assert sys.restoration_plan([fb]) == []
+
+
+def test_order_plan() -> None:
+    sys, (sub0, brk, sec1, sec2, x, y, tie, fb, _) = _faulted_system()
+    # Transfer y back to sub0 once the fault is repaired
+    targets = {brk: State.ON, sec1: State.ON, x: State.ON, tie: State.OFF}
+
+    plan = sys.order_plan(targets)
+
+    assert plan is not None
+    assert sys.validate_plan(plan) is None
+    sys.apply_plan(plan)
+    assert all(sw.state == state for sw, state in targets.items())
+    assert sys.feeder(y) is sub0
+    # fb can't be opened while sub1 feeds it
+    assert sys.order_plan({fb: State.OFF}) is None
+    assert sys.order_plan({sec2: State.ON}) == []
+
+
+def test_order_plan_matches_permutations() -> None:
+    rng = Random(11)
+    for _ in range(60):
+        sys, switches = _random_system(rng, size=12)
+        chosen = rng.sample(switches, 4)
+        targets = {sw: State(not sw.state.value) for sw in chosen}
+
+        plan = sys.order_plan(targets)
+
+        valid = [
+            order for order in permutations(chosen) if sys.validate_plan(order) is None
+        ]
+        assert (plan is None) == (len(valid) == 0)
+        if plan is not None:
+            assert sys.validate_plan(plan) is None
+
+
+def _feeders_system(rng: Random, size: int) -> Tuple[System, List[Switch]]:
+    """Radial feeders joined by a few ties, so that long plans are valid"""
+    switches: List[Switch] = []
+    for i in range(size):
+        state = State.ON if rng.random() < 0.8 else State.OFF
+        if rng.random() < 0.3:
+            switches.append(OffLoad(f"sw{i}", state))
+        else:
+            on_substation = i == 0 or rng.random() < 0.05
+            switches.append(OnLoad(f"sw{i}", state, on_substation=on_substation))
+    sys = System()
+    pairs = [(switches[rng.randrange(i)], switches[i]) for i in range(1, size)]
+    for _ in range(3):
+        sw1, sw2 = rng.sample(switches, 2)
+        pairs.append((sw1, sw2))
+    for sw1, sw2 in pairs:
+        try:
+            sys.link(sw1, sw2)
+        except SCHGError:
+            pass
+    return sys, switches
+
+
+def test_long_plans_match_full() -> None:
+    rng = Random(29)
+    for _ in range(8):
+        sys, switches = _feeders_system(rng, size=30)
+        for _ in range(3):
+            plan: List[Switch] = []
+            for _ in range(30):
+                sw = rng.choice(switches)
+                if sys.validate_plan(plan + [sw]) is None:
+                    plan.append(sw)
+            for sw in rng.sample(switches, 10):
+                sys.validation = Validation.FULL
+                expected = sys.validate_plan(plan + [sw])
+                sys.validation = Validation.DELTA
+                error = sys.validate_plan(plan + [sw])
+                assert (error is None) == (expected is None)
+                if error is not None and expected is not None:
+                    assert error.args == expected.args
+
+            # Committed at once, the indexes still answer as a full check
+            sys.validation = Validation.DYNAMIC
+            sys.inform_change(switches[0])
+            sys.apply_plan(plan)
+            for sw in switches:
+                sys.validation = Validation.FULL
+                expected_errors = sys.inform_change(sw)
+                for validation in (Validation.DELTA, Validation.DYNAMIC):
+                    sys.validation = validation
+                    assert sys.inform_change(sw) == expected_errors
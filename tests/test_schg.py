@@ -1,4 +1,17 @@
-from schg import LinkError, OnLoad, OffLoad, SCHGError, State, SwitchingError, System
+from random import Random
+from typing import List, Tuple
+from schg import (
+    LinkError,
+    OnLoad,
+    OffLoad,
+    SCHGError,
+    State,
+    Switch,
+    SwitchingError,
+    SwitchingPlanError,
+    System,
+    Validation,
+)
 from uuid import uuid1
 
 
@@ -245,3 +258,347 @@ def test_three_switches_toggle_state_to_off_offload_on_load_and_sub_connection()
             SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION,
             SwitchingError.OFFLOAD_SWITCHING_ON_LOAD,
         ]
+
+
+def test_neighbors_follow_links() -> None:
+    sw0 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sw1 = OffLoad(str(uuid1()), State.ON)
+    sw2 = OnLoad(str(uuid1()), State.OFF)
+    sys = System()
+
+    sys.link(sw0, sw1)
+    sys.link(sw1, sw2)
+    sys.link(sw1, sw0)
+
+    assert sys.neighbors(sw0) == {sw1}
+    assert sys.neighbors(sw1) == {sw0, sw2}
+    assert sys.neighbors(sw2) == {sw1}
+    assert len(sys.links) == 2
+
+
+def test_two_feeders_toggle_not_meshed() -> None:
+    sub0 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sub1 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sw0 = OnLoad(str(uuid1()), State.ON)
+    sw1 = OnLoad(str(uuid1()), State.ON)
+    tie = OnLoad(str(uuid1()), State.OFF)
+    sys = System()
+
+    sys.link(sub0, sw0)
+    sys.link(sw0, tie)
+    sys.link(tie, sw1)
+    sys.link(sw1, sub1)
+
+    sw0.toggle_state()
+    assert not sys.ismeshed
+    sw0.toggle_state()
+    assert not sys.ismeshed
+
+
+def test_reclosing_after_opening_detects_mesh() -> None:
+    sw0 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sw1 = OnLoad(str(uuid1()), State.ON)
+    sw2 = OnLoad(str(uuid1()), State.OFF)
+    sw3 = OnLoad(str(uuid1()), State.ON)
+    sys = System()
+
+    sys.link(sw0, sw1)
+    sys.link(sw0, sw2)
+    sys.link(sw1, sw3)
+    sys.link(sw2, sw3)
+
+    sw1.toggle_state()
+    sw2.toggle_state()
+    try:
+        sw1.toggle_state()
+        assert False
+    except SCHGError as e:
+        assert e.args[0] == [SwitchingError.CAUSES_MESH]
+
+
+def test_opening_splits_substations_interconnection() -> None:
+    sw0 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sw1 = OnLoad(str(uuid1()), State.ON)
+    sw2 = OnLoad(str(uuid1()), State.OFF, on_substation=True)
+    sys = System()
+
+    sys.link(sw0, sw1)
+    sys.link(sw1, sw2)
+    sw2._state = State.ON
+
+    assert sys.is_substations_connected
+    sw1.toggle_state()
+    assert not sys.is_substations_connected
+
+
+def _random_system(rng: Random, size: int = 30) -> Tuple[System, List[Switch]]:
+    switches: List[Switch] = []
+    for i in range(size):
+        state = State.ON if rng.random() < 0.7 else State.OFF
+        if rng.random() < 0.4:
+            switches.append(OffLoad(f"sw{i}", state))
+        else:
+            on_substation = rng.random() < 0.15
+            switches.append(OnLoad(f"sw{i}", state, on_substation=on_substation))
+
+    sys = System()
+    pairs = [(switches[rng.randrange(i)], switches[i]) for i in range(1, size)]
+    for _ in range(size // 6):
+        sw1, sw2 = rng.sample(switches, 2)
+        pairs.append((sw1, sw2))
+    for sw1, sw2 in pairs:
+        try:
+            sys.link(sw1, sw2)
+        except SCHGError:
+            pass
+    return sys, switches
+
+
+def test_delta_validation_matches_full() -> None:
+    rng = Random(42)
+    for _ in range(20):
+        sys, switches = _random_system(rng)
+        for _ in range(100):
+            sw = rng.choice(switches)
+            sys.validation = Validation.FULL
+            expected = sys.inform_change(sw)
+            sys.validation = Validation.DELTA
+            assert sys.inform_change(sw) == expected
+
+            if len(expected) == 0 or rng.random() < 0.3:
+                sw._state = State(not sw.state.value)
+                sys.commit_change(sw)
+
+
+def test_link_switches_are_sorted_by_name() -> None:
+    sw0 = OnLoad("b", State.ON, on_substation=True)
+    sw1 = OffLoad("a", State.ON)
+    sys = System()
+
+    sys.link(sw0, sw1)
+    sys.link(sw1, sw0)
+
+    assert len(sys.links) == 1
+    assert sys.links[0].switches == (sw1, sw0)
+    assert sys.links[0].ison
+
+
+def test_check_toggles_matches_inform_change() -> None:
+    rng = Random(5)
+    for _ in range(10):
+        sys, switches = _random_system(rng)
+        sys.validation = Validation.FULL
+        expected = [sys.inform_change(sw) for sw in switches]
+
+        assert sys.check_toggles(switches) == expected
+
+
+def _tie_system() -> Tuple[System, List[Switch]]:
+    sub0 = OnLoad("sub0", State.ON, on_substation=True)
+    sw0 = OffLoad("sw0", State.ON)
+    tie = OnLoad("tie", State.OFF)
+    sw1 = OffLoad("sw1", State.ON)
+    sub1 = OnLoad("sub1", State.ON, on_substation=True)
+    sys = System()
+    sys.link(sub0, sw0)
+    sys.link(sw0, tie)
+    sys.link(tie, sw1)
+    sys.link(sw1, sub1)
+    return sys, [sub0, sw0, tie, sw1, sub1]
+
+
+def test_apply_plan() -> None:
+    sys, (sub0, sw0, tie, _, _) = _tie_system()
+
+    sys.apply_plan([sub0, sw0, tie])
+
+    assert [sw.state for sw in (sub0, sw0, tie)] == [State.OFF, State.OFF, State.ON]
+
+
+def test_apply_plan_rolls_back() -> None:
+    sys, (sub0, sw0, tie, sw1, _) = _tie_system()
+
+    try:
+        sys.apply_plan([sub0, sw0, sw1])
+        assert False
+    except SwitchingPlanError as e:
+        assert e.args[0] == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
+        assert e.step == 2
+        assert e.switch == sw1
+
+    assert [sw.state for sw in (sub0, sw0, tie)] == [State.ON, State.ON, State.OFF]
+    assert sys.check_toggles([tie]) == [
+        [SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION]
+    ]
+
+
+def test_validate_plan() -> None:
+    sys, (sub0, _, tie, _, _) = _tie_system()
+
+    assert sys.validate_plan([sub0, tie]) is None
+    error = sys.validate_plan([tie])
+    assert error is not None
+    assert error.step == 0
+    assert sub0.state == State.ON
+    assert tie.state == State.OFF
+
+
+def test_delta_plan_validation_matches_full() -> None:
+    rng = Random(23)
+    for _ in range(20):
+        sys, switches = _random_system(rng)
+        states = [sw.state for sw in switches]
+        for _ in range(20):
+            plan = [rng.choice(switches) for _ in range(rng.randrange(1, 8))]
+            sys.validation = Validation.FULL
+            expected = sys.validate_plan(plan)
+            sys.validation = Validation.DELTA
+            error = sys.validate_plan(plan)
+
+            if expected is None:
+                assert error is None
+            else:
+                assert error is not None
+                assert error.args == expected.args
+            assert [sw.state for sw in switches] == states
+
+
+def test_inform_change_does_not_touch_states() -> None:
+    sw0 = OnLoad(str(uuid1()), State.ON, on_substation=True)
+    sw1 = OffLoad(str(uuid1()), State.OFF)
+    sys = System(Validation.FULL)
+    sys.link(sw0, sw1)
+
+    class Frozen(OffLoad):
+        @property
+        def _state(self) -> State:
+            return self.state
+
+        @_state.setter
+        def _state(self, state: State) -> None:
+            raise AssertionError("validation must not change states")
+
+    sw2 = Frozen(str(uuid1()), State.OFF)
+    sys.link(sw1, sw2)
+
+    assert sys.inform_change(sw2) == []
+    assert sys.offload_trying_on_load(sw1)
+    sys.validation = Validation.DELTA
+    assert sys.check_toggles([sw1, sw2]) == [
+        [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD],
+        [],
+    ]
+
+
+def test_unlink() -> None:
+    sys, (sub0, sw0, tie, sw1, sub1) = _tie_system()
+    assert sys.inform_change(tie) == [SwitchingError.CAUSES_SUBSTATIONS_INTERCONNECTION]
+
+    sys.unlink(sw1, tie)
+
+    assert sys.inform_change(tie) == []
+    assert sys.neighbors(tie) == {sw0}
+    assert sys.swicthes == [sub0, sub1, sw0, sw1, tie]
+    sys.unlink(sw1, sub1)
+    assert sys.swicthes == [sub0, sw0, tie]
+    assert sw1.sys is None and sub1.sys is None
+    try:
+        sys.unlink(sw1, sub1)
+        assert False
+    except KeyError:
+        pass
+
+
+def test_link_many_matches_link() -> None:
+    rng = Random(17)
+    for _ in range(10):
+        sys, switches = _random_system(rng)
+        bulk = System()
+        pairs = [link.switches for link in sys.links]
+        bulk.link_many(pairs + [(sw2, sw1) for sw1, sw2 in pairs])
+
+        assert bulk.links == sys.links
+        assert bulk.swicthes == sys.swicthes
+        assert all(sw.sys is bulk for sw in bulk.swicthes)
+        assert bulk.check_toggles(switches) == sys.check_toggles(switches)
+
+
+def test_link_many_is_atomic() -> None:
+    sys, (sub0, sw0, tie, _, sub1) = _tie_system()
+    other = OffLoad("other", State.ON)
+    links = sys.links
+
+    try:
+        sys.link_many([(tie, other), (sub0, sub1)])
+        assert False
+    except SCHGError as e:
+        assert e.args[0] == [LinkError.SUBSTATION_LINKING]
+    try:
+        sys.link_many([(tie, other), (sw0, OffLoad("sw0", State.ON))])
+        assert False
+    except SCHGError as e:
+        assert e.args[0] == [LinkError.SELF_LINKING]
+    assert sys.links == links
+    assert other.sys is None
+
+
+def test_deep_feeder_does_not_recurse() -> None:
+    sub = OnLoad("sub", State.ON, on_substation=True)
+    feeder: List[Switch] = [OffLoad(f"sw{i}", State.ON) for i in range(5000)]
+    sys = System(Validation.FULL)
+    sys.link_many(zip([sub] + feeder, feeder))
+
+    assert sys.offload_trying_on_load(feeder[-1])
+    assert sys.inform_change(feeder[-1]) == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
+    sys.validation = Validation.DELTA
+    assert sys.inform_change(feeder[-1]) == [SwitchingError.OFFLOAD_SWITCHING_ON_LOAD]
+
+
+def test_feeder_index() -> None:
+    sys, (sub0, sw0, tie, sw1, sub1) = _tie_system()
+
+    assert sys.feeder(sw0) is sub0
+    assert sys.feeder(sub1) is sub1
+    assert sys.feeder(tie) is None
+    assert sys.deenergized() == [tie]
+
+    sys.apply_plan([sub0, sw0, tie])
+    assert sys.feeder(sw0) is None
+    assert sys.feeder(tie) is sub1
+    assert sys.deenergized() == [sub0, sw0]
+
+    sw0._state = State.ON
+    sys.commit_change(sw0)
+    assert sys.feeder(sw0) is sub1
+    assert sys.deenergized() == [sub0]
+
+
+def test_feeder_index_matches_traversal() -> None:
+    rng = Random(23)
+    for _ in range(10):
+        sys, switches = _random_system(rng)
+        for _ in range(50):
+            sw = rng.choice(switches)
+            sw._state = State(not sw.state.value)
+            sys.commit_change(sw)
+
+        for sw in switches:
+            feeder = sys.feeder(sw)
+            if not sw.ison or sw not in sys.swicthes:
+                assert feeder is None
+                continue
+            island = {sw}
+            stack = [sw]
+            while stack:
+                for next_sw in sys.neighbors(stack.pop()):
+                    if next_sw.ison and next_sw not in island:
+                        island.add(next_sw)
+                        stack.append(next_sw)
+            substations = [other for other in island if other.on_substation]
+            if substations:
+                assert feeder in substations
+            else:
+                assert feeder is None
+        assert set(sys.deenergized()) == {
+            sw for sw in sys.swicthes if sys.feeder(sw) is None
+        }
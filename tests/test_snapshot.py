@@ -0,0 +1,55 @@
+from pathlib import Path
+from random import Random
+import pickle
+import pytest
+from schg import CompactSystem, OffLoad, OnLoad, State, System
+from tests.test_schg import _random_system
+
+
+def test_system_save_load(tmp_path: Path) -> None:
+    sys, _ = _random_system(Random(5))
+    sys.save(str(tmp_path / "net.snap"))
+    copy = System.load(str(tmp_path / "net.snap"))
+
+    assert copy.swicthes == sys.swicthes
+    assert [sw.state for sw in copy.swicthes] == [sw.state for sw in sys.swicthes]
+    assert copy.links == sys.links
+
+
+def test_mapped_snapshot_checks_match(tmp_path: Path) -> None:
+    sys, switches = _random_system(Random(8), size=200)
+    path = str(tmp_path / "net.snap")
+    sys.save(path)
+    mapped = CompactSystem.load(path)
+    read = CompactSystem.load(path, mmap=False)
+
+    assert isinstance(mapped.indices, memoryview)
+    assert mapped.check_toggles(switches) == sys.check_toggles(switches)
+    assert read.check_toggles(switches) == sys.check_toggles(switches)
+
+    view = mapped.switch(switches[0].name)
+    view._state = State.OFF if view.ison else State.ON
+    mapped.commit_change(view)
+    assert CompactSystem.load(path).switch(view.name).state != view.state
+
+    clone = pickle.loads(pickle.dumps(mapped))
+    assert clone.check_toggles(switches) == mapped.check_toggles(switches)
+
+
+def test_load_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "net.snap"
+    path.write_bytes(b"not a snapshot at all, but long enough for a header")
+
+    with pytest.raises(ValueError):
+        CompactSystem.load(str(path))
+    with pytest.raises(ValueError):
+        System.load(str(path))
+
+
+def test_save_rejects_newlines_in_names(tmp_path: Path) -> None:
+    sys = System()
+    sys.link(OnLoad("sub", State.ON, on_substation=True), OffLoad("a\nb", State.ON))
+
+    with pytest.raises(ValueError):
+        sys.save(str(tmp_path / "net.snap"))
+    assert list(tmp_path.iterdir()) == []
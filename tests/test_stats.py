@@ -0,0 +1,73 @@
+from typing import List
+from schg import CheckEvent, System, Validation
+from tests.test_schg import _tie_system
+
+
+def test_disabled_by_default() -> None:
+    sys, (_, _, tie, _, _) = _tie_system()
+
+    sys.inform_change(tie)
+
+    assert sys.stats is None
+
+
+def test_delta_checks_are_recorded() -> None:
+    sys, (_, sw0, tie, _, _) = _tie_system()
+    events: List[CheckEvent] = []
+    stats = sys.instrument(events.append)
+
+    sys.inform_change(tie)
+    sys.inform_change(sw0)
+
+    inform = stats.checks["inform_change"]
+    assert inform.calls == 2
+    assert inform.seconds > 0
+    # Only the first call traverses, to build the energized forest. The
+    # islands are then all answered by it.
+    assert inform.nodes == 5 and inform.edges == 4
+    assert stats.forest_misses == 1 and stats.forest_hits == 1
+    assert stats.island_hits == 3 and stats.island_misses == 0
+    assert [event.check for event in events] == ["inform_change"] * 2
+    assert events[0].nodes == 5 and events[1].nodes == 0
+
+
+def test_full_checks_are_broken_down() -> None:
+    sys, (_, sw0, _, _, _) = _tie_system()
+    sys.validation = Validation.FULL
+    stats = sys.instrument()
+
+    sys.inform_change(sw0)
+    sys.ismeshed
+
+    assert stats.checks["ismeshed"].calls == 2
+    assert stats.checks["ismeshed"].nodes == 10
+    assert stats.checks["is_substations_connected"].calls == 1
+    assert stats.checks["offload_trying_on_load"].calls == 1
+    inform = stats.checks["inform_change"]
+    # The forest, the energized switches, then sw0 up to sub0
+    assert inform.nodes == 5 + 3 + 2
+    assert inform.seconds >= stats.checks["is_substations_connected"].seconds
+
+    stats.reset()
+    assert stats.checks == {}
+    sys.stats = None
+    sys.ismeshed
+    assert stats.checks == {}
+
+
+def test_commit_counts_forest_rebuilds() -> None:
+    sys, (sub0, sw0, tie, sw1, sub1) = _tie_system()
+    stats = sys.instrument()
+
+    sys.apply_plan([sub0, sw0, tie])
+    sys.unlink(tie, sw1)
+    sys.check_toggles([sw1, sub1])
+    sys.check_toggles([sw1, sub1])
+
+    assert stats.checks["validate_plan"].calls == 1
+    # The plan is committed at once
+    assert stats.checks["commit_change"].calls == 1
+    assert stats.checks["check_toggles"].calls == 2
+    assert stats.forest_misses == 2
+    assert 0 < stats.forest_hit_rate < 1
+    assert isinstance(System().instrument().island_hit_rate, float)
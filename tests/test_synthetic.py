@@ -0,0 +1,37 @@
+from pathlib import Path
+from typing import List
+from schg import FromDSS, FromFile, generate_dss, generate_schg, iter_synthetic
+from schg.__parser import iter_commands
+
+
+def test_iter_synthetic_is_seeded() -> None:
+    network = list(iter_synthetic(500, 7, substations=3, ties=0.05))
+
+    assert len(network) == 500
+    assert network == list(iter_synthetic(500, 7, substations=3, ties=0.05))
+    assert network != list(iter_synthetic(500, 8, substations=3, ties=0.05))
+    assert sum(sw.on_substation for sw in network) == 3
+    assert len({sw.name for sw in network}) == 500
+
+
+def test_generated_decks_are_valid(tmp_path: Path) -> None:
+    schg = str(tmp_path / "network.schg")
+    generate_schg(schg, 2000, 1, substations=4)
+    master = generate_dss(
+        str(tmp_path / "deck"), 2000, 1, substations=4, per_file=50, fanout=3
+    )
+    from_file = FromFile(schg)
+    from_dss = FromDSS(master)
+
+    assert len(from_file.switches) == 2000
+    assert from_dss.switches == from_file.switches
+    assert from_dss.sys.links == from_file.sys.links
+    assert FromDSS(master, fast=True).switches == from_dss.switches
+    assert not from_file.sys.ismeshed
+    assert not from_file.sys.is_substations_connected
+
+    files: List[str] = []
+    for _ in iter_commands(master, files):
+        pass
+    # master, the redirects of 1 + 2 + 5 + 14 folders and 40 leaf files
+    assert len(files) == 1 + 22 + 40